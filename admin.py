@@ -1,14 +1,35 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db import connection, transaction
+from django.db.models import Q
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from . import notifications, tasks
 from .models import User, UserProfile, Notification
+from .pagination import EstimatedCountPaginator
+from .search import TextMatch
+
+
+# Search input is bounded: extra terms and characters are ignored
+SEARCH_MAX_TERMS = 3
+SEARCH_MAX_LENGTH = 100
+# Trigram indexes need 3 characters; shorter terms match names by prefix
+TRIGRAM_MIN_LENGTH = 3
+# Larger bulk action selections run on task workers, in chunks of this size
+BULK_ACTION_INLINE_LIMIT = 5000
 
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'full_name', 'username', 'program_level', 'country', 'is_staff', 'is_active', 'created_at')
     list_filter = ('is_staff', 'is_active', 'program_level', 'country', 'created_at')
-    search_fields = ('email', 'username', 'full_name')
+    search_fields = ('^email', '^username', 'full_name')
     ordering = ('-created_at',)
+    # No exact COUNT(*) over millions of rows on every page, and no second
+    # count of the unfiltered table
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Personal Information', {'fields': ('full_name',)}),
@@ -20,6 +41,20 @@ class UserAdmin(BaseUserAdmin):
         }),
         ('Preferences', {'fields': ('newsletter_subscribed',)}),
     )
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Email / username by prefix, full name by substring, all index-backed on PostgreSQL"""
+        for term in search_term.split()[:SEARCH_MAX_TERMS]:
+            term = term[:SEARCH_MAX_LENGTH]
+            if '@' in term:
+                queryset = queryset.filter(email__istartswith=term)
+                continue
+            if len(term) >= TRIGRAM_MIN_LENGTH:
+                name = Q(full_name__icontains=term)
+            else:
+                name = Q(full_name__istartswith=term)
+            queryset = queryset.filter(Q(email__istartswith=term) | Q(username__istartswith=term) | name)
+        return queryset, False
 
 
 @admin.register(UserProfile)
@@ -31,8 +66,91 @@ class UserProfileAdmin(admin.ModelAdmin):
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'title', 'notification_type', 'is_read', 'created_at')
+    # The user column (and __str__) would otherwise cost a query per row
+    list_select_related = ('user',)
     list_filter = ('notification_type', 'is_read', 'created_at')
-    search_fields = ('user__email', 'title', 'message')
+    # Used off PostgreSQL; see get_search_results
+    search_fields = ('^user__email', 'title', 'message')
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'read_at')
+    raw_id_fields = ('user', 'scholarship')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['mark_selected_read', 'resend_selected', 'delete_selected']
+    # Only a count is shown: the stock page lists every selected object
+    delete_selected_confirmation_template = 'admin/accounts/notification/delete_selected_confirmation.html'
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Recipient email by prefix; title and message through the full-text index on PostgreSQL"""
+        search_term = search_term.strip()[:SEARCH_MAX_LENGTH]
+        if '@' in search_term:
+            return queryset.filter(user__email__istartswith=search_term), False
+        if search_term and connection.vendor == 'postgresql':
+            return queryset.filter(TextMatch(('title', 'message'), search_term)), False
+        return super().get_search_results(request, queryset, search_term)
+    
+    def save_model(self, request, obj, form, change):
+        """Keeps ``read_at``, the unread counters and the notifications version in step with edits"""
+        if change and 'is_read' in form.changed_data:
+            obj.read_at = timezone.now() if obj.is_read else None
+        super().save_model(request, obj, form, change)
+        if change and form.changed_data:
+            # Any edit changes what the recipient's cached pages show
+            notifications.record_edit(obj, form.initial['user'], form.initial['is_read'])
+    
+    def delete_model(self, request, obj):
+        notifications.bulk_delete(Notification.objects.filter(pk=obj.pk))
+    
+    def run_bulk_action(self, request, queryset, action, done):
+        """Apply ``action`` in one statement, or queue it in chunks for large selections"""
+        if queryset[:BULK_ACTION_INLINE_LIMIT + 1].count() <= BULK_ACTION_INLINE_LIMIT:
+            count = notifications.BULK_ACTIONS[action](queryset)
+            self.message_user(request, f'{count} notification{"s" if count != 1 else ""} {done}.', messages.SUCCESS)
+            return
+        chunks = 0
+        chunk = []
+        with transaction.atomic():
+            for pk in queryset.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=BULK_ACTION_INLINE_LIMIT):
+                chunk.append(pk)
+                if len(chunk) == BULK_ACTION_INLINE_LIMIT:
+                    tasks.apply_notification_action.delay(action, chunk)
+                    chunks += 1
+                    chunk = []
+            if chunk:
+                tasks.apply_notification_action.delay(action, chunk)
+                chunks += 1
+        self.message_user(
+            request, f'Large selection: queued in {chunks} background jobs; notifications will be {done} shortly.',
+            messages.INFO,
+        )
+    
+    @admin.action(description='Mark selected notifications as read', permissions=['change'])
+    def mark_selected_read(self, request, queryset):
+        self.run_bulk_action(request, queryset, 'mark_read', 'marked as read')
+    
+    @admin.action(description='Resend selected notifications (mark unread)', permissions=['change'])
+    def resend_selected(self, request, queryset):
+        self.run_bulk_action(request, queryset, 'resend', 'resent')
+    
+    @admin.action(description='Delete selected notifications', permissions=['delete'])
+    def delete_selected(self, request, queryset):
+        """Replaces the stock action, which loads, logs and lists every object"""
+        if request.POST.get('post'):
+            self.run_bulk_action(request, queryset, 'delete', 'deleted')
+            return None
+        select_across = request.POST.get('select_across') == '1'
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Are you sure?',
+            'opts': self.model._meta,
+            'count': queryset.count(),
+            # Across all pages the changelist filters (kept in the URL) pick
+            # the rows; one selected id is still required by the changelist
+            'pks': queryset.values_list('pk', flat=True)[:1] if select_across else queryset.values_list('pk', flat=True),
+            'select_across': select_across,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            'media': self.media,
+        }
+        request.current_app = self.admin_site.name
+        return TemplateResponse(request, self.delete_selected_confirmation_template, context)
 
@@ -0,0 +1,25 @@
+"""
+ASGI entry point for ScholarMatch
+
+The async views (signup, login, password change) and the notification
+stream need an ASGI server: under WSGI a streaming response is read to the
+end before anything is sent. Run it with uvicorn, as start.ps1 does:
+
+    python -m uvicorn asgi:application --reload
+
+While DEBUG is on static files are served too, as runserver does.
+"""
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scholarmatch_project.settings')
+
+application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.DEBUG:
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
@@ -0,0 +1,52 @@
+"""
+Shared helpers for the benchmark scripts
+
+Benchmarks run against the configured database inside a transaction that is
+rolled back at the end, so seeded rows never persist.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scholarmatch_project.settings')
+    django.setup()
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back"""
+    from django.db import transaction
+
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+@contextmanager
+def timed(label, rows=None):
+    """Print wall time (and throughput when ``rows`` is given) for the block"""
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    if rows:
+        print(f"{label}: {elapsed * 1000:.1f} ms ({rows / elapsed:,.0f} rows/s)")
+    else:
+        print(f"{label}: {elapsed * 1000:.1f} ms")
+
+
+def create_user(email, **fields):
+    from accounts.models import User
+
+    fields.setdefault('full_name', 'Benchmark User')
+    return User.objects.create_user(username=email, email=email, password='benchmark-pass', **fields)
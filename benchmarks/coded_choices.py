@@ -0,0 +1,138 @@
+"""
+Size and query latency of slug vs smallint-coded choice columns
+
+Builds two scratch tables with the users table's choice columns
+(program_level, preferred_program_level, budget_range, study_duration) plus
+created_at and the (program_level, created_at) index: one storing slugs as
+before migration 0013, one storing accounts.choices codes. Prints table and
+index sizes (PostgreSQL, SQLite) and the median latency of an indexed
+equality count, a filtered newest-first page and a GROUP BY, then times
+filter(program_level=...) and values_list() through the ORM. Everything is
+rolled back.
+Run: python -m accounts.benchmarks.coded_choices [--rows 1000000] [--repeat 5]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from django.db import connection
+
+from accounts.choices import BUDGET_RANGES, PREFERRED_PROGRAM_LEVELS, PROGRAM_LEVELS, STUDY_DURATIONS
+from accounts.models import User
+
+COLUMNS = (
+    ('program_level', PROGRAM_LEVELS),
+    ('preferred_program_level', PREFERRED_PROGRAM_LEVELS),
+    ('budget_range', BUDGET_RANGES),
+    ('study_duration', STUDY_DURATIONS),
+)
+TABLES = {'slugs': 'bench_choice_slugs', 'codes': 'bench_choice_codes'}
+
+# (label, SQL, whether it filters on one level)
+QUERIES = [
+    ('equality count', "SELECT COUNT(*) FROM {table} WHERE program_level = %s", True),
+    ('newest 25 at level', "SELECT id FROM {table} WHERE program_level = %s ORDER BY created_at DESC LIMIT 25", True),
+    ('group by level', "SELECT program_level, COUNT(*) FROM {table} GROUP BY program_level", False),
+]
+
+
+def create_tables(cursor):
+    for kind, table in TABLES.items():
+        column_type = 'varchar(50)' if kind == 'slugs' else 'smallint'
+        columns = ', '.join(f'{name} {column_type} NULL' for name, _ in COLUMNS)
+        cursor.execute(f'CREATE TABLE {table} (id integer PRIMARY KEY, {columns}, created_at timestamp NOT NULL)')
+        cursor.execute(f'CREATE INDEX {table}_level_idx ON {table} (program_level, created_at DESC)')
+
+
+def seed(cursor, rows):
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    placeholders = ', '.join(['%s'] * (len(COLUMNS) + 2))
+    names = ', '.join(name for name, _ in COLUMNS)
+    with timed(f"seed {rows} rows into both tables", rows=rows * 2):
+        for offset in range(0, rows, 10000):
+            slugs, codes = [], []
+            for i in range(offset, min(offset + 10000, rows)):
+                # About a fifth of users leave each choice empty
+                values = [rng.choice(list(coded.codes)) if rng.random() < 0.8 else None for _, coded in COLUMNS]
+                created = start + timedelta(minutes=i)
+                slugs.append((i, *values, created))
+                codes.append((i, *(coded.codes.get(value) for value, (_, coded) in zip(values, COLUMNS)), created))
+            for kind, batch in (('slugs', slugs), ('codes', codes)):
+                cursor.executemany(
+                    f'INSERT INTO {TABLES[kind]} (id, {names}, created_at) VALUES ({placeholders})', batch
+                )
+    if connection.vendor == 'postgresql':
+        for table in TABLES.values():
+            cursor.execute(f'ANALYZE {table}')
+
+
+def sizes(cursor, table):
+    """(table bytes, index bytes) or None where the backend cannot tell"""
+    index = f'{table}_level_idx'
+    if connection.vendor == 'postgresql':
+        cursor.execute('SELECT pg_relation_size(%s), pg_relation_size(%s)', [table, index])
+        return cursor.fetchone()
+    if connection.vendor == 'sqlite':
+        cursor.execute('SELECT name, SUM(pgsize) FROM dbstat WHERE name IN (%s, %s) GROUP BY name', [table, index])
+        found = dict(cursor.fetchall())
+        return found.get(table, 0), found.get(index, 0)
+    return None
+
+
+def latency(cursor, sql, params, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies)
+
+
+def compare(cursor, repeat):
+    for kind, table in TABLES.items():
+        found = sizes(cursor, table)
+        if found:
+            print(f"{kind}: table {found[0] / 2 ** 20:.1f} MiB, index {found[1] / 2 ** 20:.1f} MiB")
+    for label, sql, by_level in QUERIES:
+        timings = []
+        for kind, table in TABLES.items():
+            value = 'masters' if kind == 'slugs' else PROGRAM_LEVELS.codes['masters']
+            params = [value] if by_level else []
+            timings.append(f"{kind} {latency(cursor, sql.format(table=table), params, repeat):.1f} ms")
+        print(f"{label}: {', '.join(timings)}")
+
+
+def orm(rows, repeat):
+    """Seeds users and times the ORM paths that go through CodedChoiceField"""
+    levels = list(PROGRAM_LEVELS.codes)
+    User.objects.bulk_create(
+        [User(username=f"coded-{i}@benchmark.local", email=f"coded-{i}@benchmark.local",
+              full_name='Benchmark User', program_level=levels[i % len(levels)]) for i in range(rows)],
+        batch_size=5000,
+    )
+    with timed(f"filter(program_level='masters').count() x{repeat}"):
+        for _ in range(repeat):
+            User.objects.filter(program_level='masters').count()
+    with timed(f"values_list(program_level) over {rows} users", rows=rows):
+        assert set(User.objects.values_list('program_level', flat=True)) >= set(levels)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    with rolled_back():
+        with connection.cursor() as cursor:
+            create_tables(cursor)
+            seed(cursor, args.rows)
+            compare(cursor, args.repeat)
+        orm(min(args.rows, 200000), args.repeat)
@@ -0,0 +1,67 @@
+"""
+Assert that the dashboard issues a constant number of queries
+
+Seeds a small and a large data set for the same user and checks that
+rendering /dashboard/ costs the same number of queries for both.
+Run: python -m accounts.benchmarks.dashboard_queries
+"""
+from ._common import create_user, rolled_back, setup, timed
+
+setup()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from accounts.models import Notification
+from scholarships.models import BookmarkedScholarship, Scholarship, ScholarshipApplication
+
+
+def seed(user, size):
+    scholarships = Scholarship.objects.bulk_create([
+        Scholarship(
+            title=f"Benchmark Scholarship {i}",
+            program_level='masters',
+            study_country='Germany',
+            field_of_study='Computer Science',
+            is_active=True,
+        )
+        for i in range(size)
+    ])
+    BookmarkedScholarship.objects.bulk_create(
+        [BookmarkedScholarship(user=user, scholarship=s) for s in scholarships]
+    )
+    ScholarshipApplication.objects.bulk_create(
+        [ScholarshipApplication(user=user, scholarship=s, status='draft') for s in scholarships]
+    )
+    Notification.objects.bulk_create([
+        Notification(user=user, notification_type='system', title=f"Notice {i}", message='Benchmark')
+        for i in range(size)
+    ])
+
+
+def dashboard_queries(size):
+    with rolled_back():
+        user = create_user(
+            f"dashboard-{size}@benchmark.local",
+            program_level='masters',
+            preferred_country='Germany',
+            field_of_study='computer-science',
+        )
+        seed(user, size)
+        client = Client()
+        client.force_login(user)
+        client.get('/dashboard/')  # warm the recommendation index
+        with timed(f"dashboard with {size} rows"), CaptureQueriesContext(connection) as queries:
+            response = client.get('/dashboard/')
+        assert response.status_code == 200, response.status_code
+        return len(queries)
+
+
+if __name__ == "__main__":
+    setup_test_environment()
+    small = dashboard_queries(10)
+    large = dashboard_queries(2000)
+    print(f"queries: {small} (10 rows) vs {large} (2000 rows)")
+    assert small == large, "dashboard query count grows with data size"
+    print("OK: dashboard query count is constant")
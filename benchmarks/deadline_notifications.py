@@ -0,0 +1,59 @@
+"""
+Throughput of the deadline-notification job over synthetic bookmarks
+
+Seeds --users users each bookmarking --per-user scholarships that close within
+the week, runs the generator twice (the second run must create nothing) and
+rolls everything back.
+Run: python -m accounts.benchmarks.deadline_notifications [--users 20000] [--per-user 50]
+"""
+import argparse
+from datetime import timedelta
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from django.utils import timezone
+
+from accounts.deadlines import generate_deadline_notifications
+from accounts.models import User
+from scholarships.models import BookmarkedScholarship, Scholarship
+
+
+def seed(users, per_user):
+    today = timezone.localdate()
+    with timed(f"seed {per_user} scholarships"):
+        scholarships = Scholarship.objects.bulk_create([
+            Scholarship(title=f"Deadline Benchmark {i}", deadline=today + timedelta(days=i % 8), is_active=True)
+            for i in range(per_user)
+        ])
+    with timed(f"seed {users} users"):
+        created = User.objects.bulk_create(
+            [
+                User(username=f"deadline-{i}@benchmark.local", email=f"deadline-{i}@benchmark.local",
+                     full_name='Benchmark User')
+                for i in range(users)
+            ],
+            batch_size=5000,
+        )
+    with timed(f"seed {users * per_user} bookmarks", rows=users * per_user):
+        BookmarkedScholarship.objects.bulk_create(
+            (BookmarkedScholarship(user=user, scholarship=s) for user in created for s in scholarships),
+            batch_size=10000,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--per-user', type=int, default=50)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+    with rolled_back():
+        seed(args.users, args.per_user)
+        for run in ('first run', 're-run'):
+            stats = generate_deadline_notifications(chunk_size=args.chunk_size)
+            print(f"{run}: scanned {stats['scanned']} bookmarks in {stats['seconds']:.1f}s "
+                  f"({stats['rows_per_second']:,.0f} rows/s), created {stats['created']}")
+        assert stats['created'] == 0, 're-run created duplicate notifications'
+    print("OK: re-run was idempotent")
@@ -0,0 +1,103 @@
+"""
+Latency of a cheap endpoint while logins hammer the password hasher
+
+Drives the ASGI app in-process: --concurrency clients log in as fast as they
+can for --seconds while one client polls /api/notifications/unread-count/;
+prints the poll latency idle and during the storm. --inline hashes on the
+thread that runs sync views and ORM calls, as the sync login view used to, for
+comparison. Uses the configured PASSWORD_HASHERS (the pool workers load the
+same settings). The benchmark user is deleted at the end.
+Run: python -m accounts.benchmarks.login_storm [--concurrency 32] [--seconds 10] [--inline]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import nullcontext
+from unittest import mock
+
+from ._common import create_user, setup
+
+setup()
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient
+from django.test.utils import override_settings
+
+from accounts import passwords
+
+EMAIL = 'login-storm@benchmark.local'
+PASSWORD = 'benchmark-pass'
+
+
+def summary(label, latencies, seconds=None):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    line = (f"{label}: {len(latencies)} requests, p50 {statistics.median(latencies):.1f} ms, "
+            f"p95 {p95:.1f} ms, max {latencies[-1]:.1f} ms")
+    if seconds:
+        line += f" ({len(latencies) / seconds:,.1f}/s)"
+    print(line)
+
+
+async def poll(client, until):
+    latencies = []
+    while time.perf_counter() < until:
+        started = time.perf_counter()
+        response = await client.get('/api/notifications/unread-count/')
+        assert response.status_code == 200, response.status_code
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def log_in_repeatedly(until):
+    client = AsyncClient()
+    latencies = []
+    while time.perf_counter() < until:
+        started = time.perf_counter()
+        response = await client.post('/api/login/', {'email': EMAIL, 'password': PASSWORD})
+        assert response.status_code == 200, response.status_code
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def run(concurrency, seconds):
+    user = await sync_to_async(create_user)(EMAIL)
+    user.set_password(PASSWORD)
+    await user.asave(update_fields=['password'])
+    probe = AsyncClient()
+    await sync_to_async(probe.force_login)(user)
+    # Start the pool before measuring
+    await passwords.make_password(PASSWORD)
+
+    summary('unread-count, idle', await poll(probe, time.perf_counter() + min(seconds, 3)))
+    until = time.perf_counter() + seconds
+    results = await asyncio.gather(poll(probe, until), *(log_in_repeatedly(until) for _ in range(concurrency)))
+    summary('unread-count, during storm', results[0])
+    summary('logins', [latency for logins in results[1:] for latency in logins], seconds)
+
+
+def inline_hashing():
+    """Hash on the thread-sensitive executor, like the old sync views"""
+    async def run_inline(func, *args):
+        return await sync_to_async(func)(*args)
+    return mock.patch.object(passwords, '_run', run_inline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--inline', action='store_true', help='Hash inline instead of in the pool')
+    args = parser.parse_args()
+    print(f"{'inline' if args.inline else f'pool of {passwords.workers()}'} hashing, "
+          f"{args.concurrency} concurrent login clients")
+    try:
+        with override_settings(ALLOWED_HOSTS=['testserver']), (inline_hashing() if args.inline else nullcontext()):
+            asyncio.run(run(args.concurrency, args.seconds))
+    finally:
+        from accounts.models import User
+
+        User.objects.filter(email=EMAIL).delete()
+        passwords.shutdown()
@@ -0,0 +1,75 @@
+"""
+NotificationAdmin changelist queries and bulk action cost
+
+Seeds --users users with --per-user notifications each, counts the queries
+of one changelist page, then times marking every notification read with
+per-object saves (as a change-form loop would) against
+notifications.bulk_mark_read. Everything is rolled back.
+Run: python -m accounts.benchmarks.notification_admin [--users 2000] [--per-user 50]
+"""
+import argparse
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from accounts import notifications
+from accounts.models import Notification, User
+
+
+def seed(users, per_user):
+    created = User.objects.bulk_create(
+        [User(username=f"notif-admin-{i}@benchmark.local", email=f"notif-admin-{i}@benchmark.local",
+              full_name='Benchmark User') for i in range(users)],
+        batch_size=5000,
+    )
+    with timed(f"seed {users * per_user} notifications", rows=users * per_user):
+        Notification.objects.bulk_create(
+            [Notification(user=user, notification_type='system', title=f"Deadline reminder {j}",
+                          message='Your application deadline is approaching.')
+             for user in created for j in range(per_user)],
+            batch_size=5000,
+        )
+    notifications.recount_unread(User.objects.filter(pk__in=[user.pk for user in created]))
+
+
+def changelist_queries(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/admin/accounts/notification/')
+    assert response.status_code == 200
+    print(f"changelist page: {len(queries.captured_queries)} queries")
+
+
+def save_each():
+    now = timezone.now()
+    for notification in Notification.objects.filter(is_read=False):
+        notification.is_read = True
+        notification.read_at = now
+        notification.save()
+        notifications.adjust_unread(notification.user_id, -1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--per-user', type=int, default=50)
+    args = parser.parse_args()
+    total = args.users * args.per_user
+    with override_settings(ALLOWED_HOSTS=['testserver']), rolled_back():
+        seed(args.users, args.per_user)
+        staff = User.objects.create_superuser(username='notif-admin@benchmark.local',
+                                              email='notif-admin@benchmark.local', password='benchmark-pass')
+        client = Client()
+        client.force_login(staff)
+        changelist_queries(client)
+        with rolled_back(), timed('per-object save', rows=total):
+            save_each()
+        with timed('bulk_mark_read', rows=total):
+            notifications.bulk_mark_read(Notification.objects.all())
+        seeded = User.objects.filter(email__startswith='notif-admin-')
+        assert not seeded.filter(unread_notifications_count__gt=0).exists()
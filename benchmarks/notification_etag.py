@@ -0,0 +1,53 @@
+"""
+Check that conditional GETs on notification endpoints skip the notifications table
+
+Fetches each endpoint, replays the request with If-None-Match and asserts a
+304 that issued no query against the notifications table; then creates a
+notification and asserts the ETag changes.
+Run: python -m accounts.benchmarks.notification_etag
+"""
+from ._common import create_user, rolled_back, setup, timed
+
+setup()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from accounts.models import Notification
+
+ENDPOINTS = ['/api/notifications/unread-count/', '/notifications/']
+
+
+def notification_queries(queries):
+    return [q['sql'] for q in queries if '"notifications"' in q['sql']]
+
+
+def check(client, user, url):
+    first = client.get(url)
+    etag = first['ETag']
+    with timed(f"{url} 304"), CaptureQueriesContext(connection) as queries:
+        cached = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304, cached.status_code
+    touched = notification_queries(queries)
+    print(f"  {len(queries)} queries in total, {len(touched)} against notifications")
+    assert not touched, touched
+
+    Notification.objects.create(user=user, notification_type='system', title='New', message='Changed')
+    changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200 and changed['ETag'] != etag, changed.status_code
+
+
+if __name__ == "__main__":
+    setup_test_environment()
+    with rolled_back():
+        user = create_user('etag@benchmark.local')
+        Notification.objects.bulk_create([
+            Notification(user=user, notification_type='system', title=f"Notice {i}", message='Benchmark')
+            for i in range(500)
+        ])
+        client = Client()
+        client.force_login(user)
+        for url in ENDPOINTS:
+            check(client, user, url)
+    print("OK: 304 responses issue no notifications queries")
@@ -0,0 +1,108 @@
+"""
+EXPLAIN plans and timings for the hot notification queries, before/after indexes
+
+PostgreSQL only. Seeds --rows notifications (several million by default)
+spread over --users users with generate_series, then runs each hot query with
+only the original FK index ("before") and with the composite/partial indexes
+("after"). Everything, including the index changes, is rolled back at the end.
+Run: python -m accounts.benchmarks.notification_indexes [--rows 3000000] [--users 2000]
+"""
+import argparse
+import time
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import Notification, User
+from accounts.pagination import decode_cursor, keyset_page
+
+BASELINE_INDEX = 'notif_bench_user_id_idx'
+
+
+def seed(users, rows):
+    with timed(f"seed {users} users"):
+        User.objects.bulk_create(
+            [
+                User(username=f"notif-bench-{i}@benchmark.local", email=f"notif-bench-{i}@benchmark.local",
+                     full_name='Benchmark User')
+                for i in range(users)
+            ],
+            batch_size=5000,
+        )
+    first_id = User.objects.filter(email__startswith='notif-bench-').order_by('pk').values_list('pk', flat=True)[0]
+    with timed(f"seed {rows} notifications", rows=rows), connection.cursor() as cursor:
+        # ~90% read, spread over the last two years
+        cursor.execute(
+            """
+            INSERT INTO notifications (user_id, notification_type, title, message, is_read, created_at, read_at)
+            SELECT %s + (n %% %s), 'deadline_approaching', 'Deadline approaching', 'Benchmark notification',
+                   n %% 10 <> 0, now() - (n %% 63072000) * interval '1 second', NULL
+            FROM generate_series(1, %s) AS n
+            """,
+            [first_id, users, rows],
+        )
+        cursor.execute('ANALYZE notifications')
+    return first_id
+
+
+def hot_queries(user_id):
+    """(name, queryset) pairs mirroring the queries issued by the views"""
+    user_notifications = Notification.objects.filter(user_id=user_id)
+    yield 'unread rows', user_notifications.filter(is_read=False).values('id')
+    yield 'first page', user_notifications.order_by('-created_at', '-id')[:21]
+    _, cursor = keyset_page(user_notifications, page_size=500)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        yield 'later page', user_notifications.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        ).order_by('-created_at', '-id')[:21]
+    yield 'unread page', user_notifications.filter(is_read=False).order_by('-created_at')[:21]
+
+
+def run(label, user_id):
+    print(f"\n=== {label} ===")
+    for name, queryset in hot_queries(user_id):
+        started = time.perf_counter()
+        list(queryset)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"-- {name}: {elapsed:.2f} ms")
+        print(queryset.explain(analyze=True, buffers=True))
+
+
+def set_indexes(schema_editor, baseline):
+    indexes = Notification._meta.indexes
+    with connection.cursor() as cursor:
+        if baseline:
+            for index in indexes:
+                cursor.execute(f'DROP INDEX IF EXISTS "{index.name}"')
+            cursor.execute(f'CREATE INDEX "{BASELINE_INDEX}" ON notifications (user_id)')
+        else:
+            cursor.execute(f'DROP INDEX IF EXISTS "{BASELINE_INDEX}"')
+            for index in indexes:
+                schema_editor.add_index(Notification, index)
+        cursor.execute('ANALYZE notifications')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=3000000)
+    parser.add_argument('--users', type=int, default=2000)
+    args = parser.parse_args()
+    if connection.vendor != 'postgresql':
+        raise SystemExit('This benchmark needs PostgreSQL (EXPLAIN ANALYZE, generate_series)')
+    started = timezone.now()
+    with rolled_back():
+        first_id = seed(args.users, args.rows)
+        with connection.schema_editor(atomic=False) as schema_editor:
+            with timed('switch to baseline indexes'):
+                set_indexes(schema_editor, baseline=True)
+            run('before: FK index only', first_id)
+            with timed('build composite / partial indexes'):
+                set_indexes(schema_editor, baseline=False)
+            run('after: composite / partial indexes', first_id)
+    print(f"\nFinished in {(timezone.now() - started).total_seconds():.1f}s; all changes rolled back")
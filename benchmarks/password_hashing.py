@@ -0,0 +1,92 @@
+"""
+Logins per second per core for each password-hasher setting
+
+Times hasher.verify() (the CPU cost of authenticate()) for Django's default
+PBKDF2 / Argon2 / scrypt parameters and the tuned hashers in
+accounts.hashers, single-threaded and, with --processes, across several
+processes to size login workers. Then shows a PBKDF2 user being rehashed on
+login. Everything is rolled back.
+Run: python -m accounts.benchmarks.password_hashing [--seconds 2] [--processes 4]
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ._common import create_user, rolled_back, setup
+
+setup()
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    identify_hasher,
+)
+from django.test.utils import override_settings
+
+from accounts.hashers import TunedArgon2PasswordHasher, TunedScryptPasswordHasher
+
+PASSWORD = 'correct horse battery staple'
+
+HASHERS = {
+    'pbkdf2 (Django default)': PBKDF2PasswordHasher,
+    'argon2 (Django default)': Argon2PasswordHasher,
+    'argon2id tuned': TunedArgon2PasswordHasher,
+    'scrypt (Django default)': ScryptPasswordHasher,
+    'scrypt tuned': TunedScryptPasswordHasher,
+}
+
+
+def verify_for(label, encoded, seconds):
+    """Verify repeatedly for ``seconds``; returns (verifications, elapsed)"""
+    hasher = HASHERS[label]()
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        assert hasher.verify(PASSWORD, encoded)
+        count += 1
+    return count, time.perf_counter() - started
+
+
+def measure(label, seconds, processes):
+    encoded = HASHERS[label]().encode(PASSWORD, HASHERS[label]().salt())
+    count, elapsed = verify_for(label, encoded, seconds)
+    line = f"{label:26} {elapsed / count * 1000:8.1f} ms/login {count / elapsed:8.1f} logins/s/core"
+    if processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(verify_for, [label] * processes, [encoded] * processes, [seconds] * processes))
+        total = sum(count / elapsed for count, elapsed in results)
+        line += f" {total:8.1f} logins/s with {processes} processes"
+    print(line)
+
+
+def rehash_on_login():
+    hashers = ['accounts.hashers.TunedArgon2PasswordHasher', 'django.contrib.auth.hashers.PBKDF2PasswordHasher']
+    with rolled_back():
+        with override_settings(PASSWORD_HASHERS=hashers[1:]):
+            user = create_user('rehash@benchmark.local')
+            user.set_password(PASSWORD)
+            user.save(update_fields=['password'])
+        with override_settings(PASSWORD_HASHERS=hashers):
+            before = identify_hasher(user.password).algorithm
+            started = time.perf_counter()
+            assert authenticate(username=user.email, password=PASSWORD) is not None
+            first = (time.perf_counter() - started) * 1000
+            user.refresh_from_db()
+            started = time.perf_counter()
+            assert authenticate(username=user.email, password=PASSWORD) is not None
+            second = (time.perf_counter() - started) * 1000
+            after = identify_hasher(user.password).algorithm
+        print(f"\nrehash on login: {before} -> {after}; first login {first:.1f} ms (verify + rehash), "
+              f"next login {second:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=2.0, help='Time spent per hasher')
+    parser.add_argument('--processes', type=int, default=1)
+    args = parser.parse_args()
+    for label in HASHERS:
+        measure(label, args.seconds, args.processes)
+    rehash_on_login()
@@ -0,0 +1,59 @@
+"""
+Requirement rules applied to a large catalog
+
+Seeds --scholarships scholarships without requirements (spread over program
+levels and countries), then times apply_rules for the first pass filling
+them in, then overwriting passes with nothing to change and after adding an
+extra rule for one country, which should only rewrite that country's rows.
+Everything is rolled back.
+Run: python -m accounts.benchmarks.requirement_rules [--scholarships 500000] [--batch-size 2000]
+"""
+import argparse
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from accounts.requirement_rules import DEFAULT_RULES, RuleSet, apply_rules
+from scholarships.models import Scholarship
+
+LEVELS = ['phd', 'masters', 'bachelors', 'diploma', None]
+COUNTRIES = ['Germany', 'Canada', 'United Kingdom', 'Australia', 'Japan', 'France', 'Netherlands', 'Sweden']
+
+
+def seed(count):
+    with timed(f"seed {count} scholarships", rows=count):
+        for start in range(0, count, 50000):
+            Scholarship.objects.bulk_create(
+                [
+                    Scholarship(
+                        title=f"Benchmark Scholarship {i}",
+                        program_level=LEVELS[i % len(LEVELS)],
+                        study_country=COUNTRIES[i % 7 % len(COUNTRIES)] if i % 11 else COUNTRIES[-1],
+                    )
+                    for i in range(start, min(start + 50000, count))
+                ],
+                batch_size=5000,
+            )
+
+
+def run(label, rules, batch_size, overwrite=False):
+    stats = apply_rules(RuleSet(rules), batch_size=batch_size, overwrite=overwrite)
+    print(f"{label}: {stats['seconds'] * 1000:.1f} ms ({stats['scanned'] / stats['seconds']:,.0f} rows/s), "
+          f"{stats['updated']} rows rewritten with {stats['updates']} UPDATEs, "
+          f"{stats['combinations']} combinations evaluated")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scholarships', type=int, default=500000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+    german = {'when': {'study_country': 'germany'}, 'extra': True, 'documents': ['language_certificate']}
+    with rolled_back():
+        seed(args.scholarships)
+        run('first pass', DEFAULT_RULES, args.batch_size)
+        assert run('unchanged rules', DEFAULT_RULES, args.batch_size, overwrite=True)['updated'] == 0
+        stats = run('extra rule for Germany', DEFAULT_RULES + [german], args.batch_size, overwrite=True)
+        assert stats['updated'] == Scholarship.objects.filter(study_country='Germany').count()
@@ -0,0 +1,87 @@
+"""
+Throughput and resumability of the new_scholarship fan-out
+
+Seeds --users users (a third matching the scholarship's program level and
+field), interrupts a first fan-out halfway, resumes it from the checkpoint and checks
+every matching user got exactly one notification. The
+rate limit is disabled unless --rate is given. Everything is rolled back.
+Run: python -m accounts.benchmarks.scholarship_fanout [--users 100000] [--rate 0]
+"""
+import argparse
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from unittest import mock
+
+from accounts import fanout, tasks
+from accounts.models import Notification, User
+from accounts.recommendations import scholarship_features, user_features
+from scholarships.models import Scholarship
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def seed(users):
+    with timed(f"seed {users} users", rows=users):
+        User.objects.bulk_create(
+            [
+                User(username=f"fanout-{i}@benchmark.local", email=f"fanout-{i}@benchmark.local",
+                     full_name='Benchmark User', program_level='masters' if i % 3 == 0 else 'bachelors',
+                     field_of_study='Computer Science' if i % 3 == 0 else 'History')
+                for i in range(users)
+            ],
+            batch_size=5000,
+        )
+    # Created without queueing the fan-out task; the benchmark drives the fan-out
+    with mock.patch.object(tasks.fan_out_new_scholarship, 'delay'):
+        return Scholarship.objects.create(
+            title='Fan-out Benchmark', program_level='masters', field_of_study='computer-science', is_active=True
+        )
+
+
+def interrupt_after(limit):
+    original = fanout._save_chunk
+    calls = []
+
+    def save_chunk(*args):
+        if len(calls) >= limit:
+            raise _Interrupted
+        calls.append(1)
+        return original(*args)
+
+    return mock.patch.object(fanout, '_save_chunk', save_chunk)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--rate', type=int, default=0)
+    args = parser.parse_args()
+    with rolled_back():
+        scholarship = seed(args.users)
+        # Only the masters third passes the SQL prefilter
+        with interrupt_after(max(1, args.users // 3 // args.chunk_size // 2)):
+            try:
+                fanout.fan_out_new_scholarship(scholarship.pk, chunk_size=args.chunk_size, rate=args.rate)
+            except _Interrupted:
+                pass
+        checkpoint = scholarship.fanout
+        checkpoint.refresh_from_db()
+        print(f"interrupted: checkpoint at user {checkpoint.last_user_id}, {checkpoint.notified_count} notified")
+        stats = fanout.fan_out_new_scholarship(scholarship.pk, chunk_size=args.chunk_size, rate=args.rate)
+        print(f"resumed: scanned {stats['scanned']} users in {stats['seconds']:.1f}s "
+              f"({stats['rows_per_second']:,.0f} rows/s), notified {stats['created']}")
+        features = scholarship_features(scholarship)
+        fields = ('program_level', 'preferred_country', 'field_of_study', 'cgpa')
+        expected = sum(
+            1 for row in User.objects.filter(is_active=True).values(*fields).iterator()
+            if fanout.matches(user_features(row), features)
+        )
+        sent = Notification.objects.filter(scholarship=scholarship, notification_type='new_scholarship').count()
+        assert sent == expected, f"{sent} notifications for {expected} matching users"
+    print(f"OK: {expected} matching users notified exactly once")
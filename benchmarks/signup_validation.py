@@ -0,0 +1,66 @@
+"""
+Per-request cost of the signup form validation
+
+Times validators.validate() over a valid and an invalid signup payload, then
+counts the queries a duplicate-email signup issues (the unique constraint
+replaces the old exists() pre-check), hashing inline. Everything is rolled
+back.
+Run: python -m accounts.benchmarks.signup_validation [--iterations 100000]
+"""
+import argparse
+import json
+import time
+
+from ._common import create_user, rolled_back, setup
+
+setup()
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts.validators import SIGNUP_FORM, validate
+from accounts.views import handle_signup
+
+VALID = {
+    'full-name': 'Ada Lovelace',
+    'email': 'ada@example.com',
+    'password': 'analytical-engine',
+    'confirm-password': 'analytical-engine',
+    'cgpa': '3.9',
+    'grades': '92%',
+}
+INVALID = {
+    'full-name': 'Ada_Lovelace!',
+    'email': 'not-an-email',
+    'password': 'short',
+    'confirm-password': 'different',
+    'cgpa': 'n/a',
+    'grades': 'A+',
+}
+
+
+def throughput(label, payload, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        validate(SIGNUP_FORM, payload)
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed / iterations * 1e6:.2f} us/request ({iterations / elapsed:,.0f} requests/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+    throughput('valid payload', VALID, args.iterations)
+    throughput('invalid payload', INVALID, args.iterations)
+    # No process pool: the count is of this signup's queries only
+    with override_settings(PASSWORD_HASHING_WORKERS=0), rolled_back():
+        create_user(VALID['email'])
+        request = RequestFactory().post('/api/signup/', json.dumps(VALID), content_type='application/json')
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(handle_signup)(request)
+        print(f"duplicate-email signup: HTTP {response.status_code}, {len(queries)} queries")
+        for query in queries:
+            print(f"  {query['sql'][:100]}")
@@ -0,0 +1,35 @@
+"""
+Enqueue latency and drain throughput of the database task queue
+
+Times --tasks ``delay()`` calls of a no-op task (the cost added to a request)
+and one in-process worker draining them, then prints the recorded per-task
+metrics. The worker only claims the benchmark's task, so real queued tasks
+are left alone. Everything is rolled back.
+Run: python -m accounts.benchmarks.task_queue [--tasks 5000]
+"""
+import argparse
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from accounts import taskqueue
+
+
+@taskqueue.task(name='benchmarks.noop', max_attempts=1)
+def noop(value):
+    return value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, default=5000)
+    args = parser.parse_args()
+    with rolled_back():
+        with timed(f"enqueue {args.tasks} tasks", rows=args.tasks):
+            for i in range(args.tasks):
+                noop.delay(i)
+        with timed(f"drain {args.tasks} tasks with one worker", rows=args.tasks):
+            processed = taskqueue.work(burst=True, names=[noop.name])
+        assert processed == args.tasks, f"processed {processed} of {args.tasks}"
+        print(f"metrics: {taskqueue.task_stats()['benchmarks.noop']}")
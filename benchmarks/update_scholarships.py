@@ -0,0 +1,77 @@
+"""
+update_scholarships: per-row save() loop versus the batched command
+
+Seeds --scholarships scholarships (half without required documents, spread
+over program levels), then times the old script's load-and-save loop and the
+update_scholarships command on identical data, with the number of
+queries each issues. Everything is rolled back.
+Run: python -m accounts.benchmarks.update_scholarships [--scholarships 50000] [--batch-size 2000]
+"""
+import argparse
+import io
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from django.core.management import call_command
+from django.db import connection
+
+from accounts.requirement_rules import get_rules
+from scholarships.models import Scholarship
+
+LEVELS = ['phd', 'masters', 'bachelors', 'diploma', None]
+
+
+def seed(count):
+    Scholarship.objects.bulk_create(
+        [
+            Scholarship(
+                title=f"Benchmark Scholarship {i}",
+                program_level=LEVELS[i % len(LEVELS)],
+                required_documents=[] if i % 2 else ['transcript'],
+                use_internal_application=i % 4 == 0,
+            )
+            for i in range(count)
+        ],
+        batch_size=5000,
+    )
+
+
+def save_each():
+    """The loop update_scholarships.py used to run"""
+    rules = get_rules()
+    for scholarship in Scholarship.objects.all():
+        if not scholarship.required_documents:
+            documents, forms = rules.requirements(rules.key([getattr(scholarship, field) for field in rules.fields]))
+            scholarship.required_documents = documents
+            scholarship.required_forms = forms
+        scholarship.use_internal_application = True
+        scholarship.save()
+
+
+def run(label, count, func):
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with rolled_back():
+        seed(count)
+        with connection.execute_wrapper(count_query), timed(label, rows=count):
+            func()
+        assert not Scholarship.objects.filter(use_internal_application=False).exists()
+        print(f"  {len(queries)} queries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scholarships', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+    run('per-row save()', args.scholarships, save_each)
+    output = io.StringIO()
+    run('update_scholarships command', args.scholarships,
+        lambda: call_command('update_scholarships', batch_size=args.batch_size, stdout=output))
+    print(f"  {output.getvalue().strip()}")
@@ -0,0 +1,114 @@
+"""
+UserAdmin changelist latency on a large users table
+
+Seeds --users users and requests the changelist (first and a deep page,
+each filter, searches by email prefix and by name) with the current admin and
+with the previous setup: plain Paginator with an exact COUNT(*), the extra
+unfiltered count, icontains search over three columns and no filter indexes.
+Prints the median latency and query count per URL. Everything is rolled back.
+Run: python -m accounts.benchmarks.user_admin [--users 1000000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from accounts.admin import UserAdmin
+from accounts.models import User
+
+LEVELS = ['bachelors', 'masters', 'phd', 'diploma']
+COUNTRIES = ['Pakistan', 'Canada', 'Germany', 'United Kingdom', 'Australia', 'Japan']
+NAMES = ['Ayesha Khan', 'John Smith', 'Maria Garcia', 'Wei Chen', 'Fatima Ali', 'Lucas Meyer']
+
+URLS = [
+    ('first page', ''),
+    ('page 500', '?p=500'),
+    ('program level', '?program_level__exact=masters'),
+    ('country', '?country=Canada'),
+    ('email prefix', '?q=admin-bench-12345'),
+    ('name', '?q=garcia'),
+]
+
+
+def seed(users):
+    with timed(f"seed {users} users", rows=users):
+        for start in range(0, users, 50000):
+            User.objects.bulk_create(
+                [
+                    User(username=f"admin-bench-{i}@benchmark.local", email=f"admin-bench-{i}@benchmark.local",
+                         full_name=NAMES[i % len(NAMES)], program_level=LEVELS[i % len(LEVELS)],
+                         country=COUNTRIES[i % len(COUNTRIES)])
+                    for i in range(start, min(start + 50000, users))
+                ],
+                batch_size=5000,
+            )
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE users')
+
+
+@contextmanager
+def previous_setup():
+    """The admin as it was: exact counts, icontains search, no filter indexes
+
+    The indexes are dropped inside the benchmark transaction; its rollback
+    brings them back.
+    """
+    with connection.cursor() as cursor:
+        for index in User._meta.indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+    with mock.patch.multiple(
+        UserAdmin,
+        paginator=Paginator,
+        show_full_result_count=True,
+        search_fields=('email', 'username', 'full_name'),
+        get_search_results=admin.ModelAdmin.get_search_results,
+    ):
+        yield
+
+
+def measure(client, label, repeat):
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    print(label)
+    for name, query in URLS:
+        latencies = []
+        for _ in range(repeat):
+            queries.clear()
+            started = time.perf_counter()
+            with connection.execute_wrapper(count_query):
+                response = client.get(f"/admin/accounts/user/{query}")
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, (query, response.status_code)
+        print(f"  {name}: {statistics.median(latencies):.1f} ms, {len(queries)} queries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    with override_settings(ALLOWED_HOSTS=['testserver']), rolled_back():
+        seed(args.users)
+        staff = User.objects.create_superuser(username='admin-bench@benchmark.local',
+                                              email='admin-bench@benchmark.local', password='benchmark-pass')
+        client = Client()
+        client.force_login(staff)
+        measure(client, 'current admin', args.repeat)
+        with previous_setup():
+            measure(client, 'previous setup', args.repeat)
@@ -0,0 +1,71 @@
+"""
+Bulk user import / export throughput
+
+Generates a CSV of --users signup rows (with a share of invalid ones), then
+times onboarding.import_users against creating the same accounts one at a
+time as the signup view does (validate, create_user, profile), and times
+export_users over the result. Everything is rolled back.
+Run: python -m accounts.benchmarks.user_import [--users 20000] [--chunk-size 1000]
+"""
+import argparse
+import csv
+import io
+
+from ._common import rolled_back, setup, timed
+
+setup()
+
+from accounts import onboarding, passwords
+from accounts.models import User, UserProfile
+from accounts.validators import IMPORT_FORM, validate
+
+LEVELS = ['bachelors', 'masters', 'phd', 'diploma']
+COUNTRIES = ['Pakistan', 'Canada', 'Germany', 'United Kingdom', 'Australia', 'Japan']
+
+
+def generate(users):
+    stream = io.StringIO()
+    writer = csv.writer(stream)
+    writer.writerow(['email', 'full-name', 'password', 'program-level', 'cgpa', 'country', 'phone'])
+    for i in range(users):
+        # Every 50th row is invalid (short password)
+        password = 'short' if i % 50 == 0 else f"import-pass-{i}"
+        writer.writerow([f"import-bench-{i}@benchmark.local", 'Benchmark User', password,
+                         LEVELS[i % len(LEVELS)], '3.20', COUNTRIES[i % len(COUNTRIES)], '0300 1234567'])
+    return stream.getvalue()
+
+
+def create_each(document):
+    created = 0
+    for _, row, _ in onboarding.read_rows(io.StringIO(document), 'csv'):
+        data = {**row, 'confirm-password': row['password']}
+        cleaned, errors = validate(IMPORT_FORM, data)
+        if errors or User.objects.filter(email=cleaned['email']).exists():
+            continue
+        user = User.objects.create_user(username=cleaned['email'], email=cleaned['email'],
+                                        password=data['password'], full_name=cleaned['full-name'],
+                                        program_level=data['program-level'], country=data['country'])
+        UserProfile.objects.create(user=user, phone=data['phone'])
+        created += 1
+    return created
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+    document = generate(args.users)
+    with rolled_back():
+        with rolled_back(), timed('per-row create (signup path)', rows=args.users):
+            per_row = create_each(document)
+        with timed(f"import_users ({passwords.workers()} hashing workers)", rows=args.users):
+            importer = onboarding.import_users(onboarding.read_rows(io.StringIO(document), 'csv'),
+                                               chunk_size=args.chunk_size)
+        assert importer.created == per_row, (importer.created, per_row)
+        print(f"created {importer.created}, failed {importer.failed}")
+        with timed('export_users csv', rows=User.objects.count()):
+            onboarding.export_users(io.StringIO(), 'csv')
+        with timed('export_users jsonl', rows=User.objects.count()):
+            onboarding.export_users(io.StringIO(), 'jsonl')
+    passwords.shutdown()
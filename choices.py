@@ -0,0 +1,139 @@
+"""
+Coded choices for the users table
+
+Program levels, budget ranges and study durations are stored as small
+integer codes rather than their slugs. This keeps rows and the
+``(program_level, created_at)`` index narrow, and makes comparisons
+integer comparisons. ``CodedChoiceField`` translates at the model boundary:
+instances, ``values()``, forms, the admin and lookups such as
+``filter(program_level='masters')`` still use the slugs the signup form
+posts, so nothing outside this module deals with codes.
+
+Codes are persisted. Append new entries with a new code, and never
+renumber or reuse one.
+"""
+from django.db import models
+from django.db.models.lookups import Exact
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+
+
+# Never stored: lookups for unknown slugs compare against it and match nothing
+UNKNOWN_CODE = 0
+
+
+@deconstructible(path='accounts.choices.CodedChoices')
+class CodedChoices:
+    """(code, slug, label) entries, with lookups both ways"""
+
+    def __init__(self, entries):
+        self.entries = tuple(tuple(entry) for entry in entries)
+        self.codes = {value: code for code, value, _ in self.entries}
+        self.values = {code: value for code, value, _ in self.entries}
+        self.choices = [(value, label) for _, value, label in self.entries]
+
+    def __eq__(self, other):
+        return isinstance(other, CodedChoices) and self.entries == other.entries
+
+    def __hash__(self):
+        return hash(self.entries)
+
+    def code(self, value):
+        """The code for a slug (case-insensitive); UNKNOWN_CODE when there is none"""
+        return self.codes.get(str(value).strip().lower(), UNKNOWN_CODE)
+
+    def subset(self, values):
+        return CodedChoices([entry for entry in self.entries if entry[1] in values])
+
+
+PREFERRED_PROGRAM_LEVELS = CodedChoices([
+    (1, 'bachelors', "Bachelor's Degree"),
+    (2, 'masters', "Master's Degree"),
+    (3, 'phd', 'PhD/Doctorate'),
+    (4, 'diploma', 'Diploma/Certificate'),
+    (5, 'postgraduate-diploma', 'Postgraduate Diploma'),
+    (6, 'exchange-program', 'Exchange Program'),
+    (7, 'summer-school', 'Summer School'),
+    (8, 'research-fellowship', 'Research Fellowship'),
+])
+
+# The levels a user can currently be studying at; same codes as above
+PROGRAM_LEVELS = PREFERRED_PROGRAM_LEVELS.subset({'bachelors', 'masters', 'phd', 'diploma'})
+
+BUDGET_RANGES = CodedChoices([
+    (1, 'under-10000', 'Under $10,000'),
+    (2, '10000-25000', '$10,000 - $25,000'),
+    (3, '25000-50000', '$25,000 - $50,000'),
+    (4, '50000-100000', '$50,000 - $100,000'),
+    (5, 'over-100000', 'Over $100,000'),
+    (6, 'full-scholarship', 'Full Scholarship Required'),
+    (7, 'partial-scholarship', 'Partial Scholarship Acceptable'),
+    (8, 'no-budget-limit', 'No Budget Limit'),
+])
+
+STUDY_DURATIONS = CodedChoices([
+    (1, '1-year', '1 Year'),
+    (2, '2-years', '2 Years'),
+    (3, '3-years', '3 Years'),
+    (4, '4-years', '4 Years'),
+    (5, '5-years', '5+ Years'),
+    (6, 'flexible', 'Flexible'),
+])
+
+
+class CodedChoiceField(models.PositiveSmallIntegerField):
+    """A smallint column whose Python value is the slug of a CodedChoices entry
+
+    Empty values are stored as NULL. Saving a slug that is not one of the
+    choices raises ValueError; looking one up just matches no rows.
+    """
+
+    def __init__(self, *args, coded=None, **kwargs):
+        self.coded = coded
+        if coded is not None:
+            kwargs['choices'] = coded.choices
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs.pop('choices', None)
+        kwargs['coded'] = self.coded
+        return name, path, args, kwargs
+
+    @cached_property
+    def validators(self):
+        # Not IntegerField's range validators: values are slugs, not numbers
+        return [*self.default_validators, *self._validators]
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return self.coded.values.get(value)
+
+    def to_python(self, value):
+        if value is None or value == '':
+            return None
+        if isinstance(value, int):
+            return self.coded.values.get(value)
+        # Canonical spelling for known slugs; unknown ones fail choice validation
+        return self.coded.values.get(self.coded.code(value), str(value))
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None or value == '':
+            return None
+        if isinstance(value, int):
+            return value
+        return self.coded.code(value)
+
+    def get_db_prep_save(self, value, connection):
+        code = super().get_db_prep_save(value, connection)
+        if code is not None and not hasattr(code, 'as_sql') and code not in self.coded.values:
+            raise ValueError(f"{value!r} is not a valid choice for {self.name}")
+        return code
+
+
+@CodedChoiceField.register_lookup
+class CodedIExact(Exact):
+    """Slugs are matched case-insensitively anyway, so iexact is exact on the code"""
+    lookup_name = 'iexact'
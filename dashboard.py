@@ -0,0 +1,59 @@
+"""
+Data loading for the dashboard page
+
+Per-user counters are read with one aggregated query (scalar subqueries on the
+users row, plus the denormalized unread-notification counter) and
+recommendations come from the recommendation cache, so a dashboard render
+costs a constant number of round trips.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import recommendations
+from .models import User
+
+
+# Application statuses that still need work from the student
+IN_PROGRESS_STATUSES = ('draft', 'in_progress')
+
+RECOMMENDATION_LIMIT = 6
+
+
+def _count(queryset):
+    """Correlated COUNT(*) over ``queryset`` for the outer user row"""
+    counted = (
+        queryset.filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def load_counters(user):
+    """Bookmark, unread-notification and in-progress application counts"""
+    from scholarships.models import BookmarkedScholarship, ScholarshipApplication
+
+    counters = (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            total_bookmarks=_count(BookmarkedScholarship.objects.all()),
+            in_progress_applications=_count(
+                ScholarshipApplication.objects.filter(status__in=IN_PROGRESS_STATUSES)
+            ),
+        )
+        .values('total_bookmarks', 'in_progress_applications')
+        .first()
+    ) or {'total_bookmarks': 0, 'in_progress_applications': 0}
+    counters['unread_notifications'] = user.unread_notifications_count
+    return counters
+
+
+def load_dashboard(user):
+    """Template context for the dashboard"""
+    context = load_counters(user)
+    context['recommended_scholarships'] = recommendations.recommendation_index.recommend(
+        user, limit=RECOMMENDATION_LIMIT
+    )
+    return context
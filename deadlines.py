@@ -0,0 +1,101 @@
+"""
+Deadline reminders for bookmarked scholarships
+
+One streamed join of bookmarks against scholarships with a deadline in the
+next week drives the job; notifications are written with chunked bulk inserts.
+Every notification carries a dedupe key (type, scholarship, user, deadline),
+so running the job again the same day creates nothing new.
+"""
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Notification
+from .notifications import create_missing_notifications, missing_notifications
+
+
+# (notification type, max days before the deadline), tightest window first
+DEADLINE_WINDOWS = (
+    ('deadline_today', 0),
+    ('deadline_soon', 3),
+    ('deadline_approaching', 7),
+)
+
+TITLES = {
+    'deadline_today': 'Deadline today: {title}',
+    'deadline_soon': 'Deadline soon: {title}',
+    'deadline_approaching': 'Deadline approaching: {title}',
+}
+
+
+def deadline_type(days_left):
+    for notification_type, max_days in DEADLINE_WINDOWS:
+        if days_left <= max_days:
+            return notification_type
+    return None
+
+
+def dedupe_key(notification_type, scholarship_id, user_id, deadline):
+    return f"{notification_type}:{scholarship_id}:{user_id}:{deadline:%Y%m%d}"
+
+
+def build_notification(user_id, scholarship_id, title, deadline, today):
+    days_left = (deadline - today).days
+    notification_type = deadline_type(days_left)
+    if days_left == 0:
+        when = 'today'
+    elif days_left == 1:
+        when = 'tomorrow'
+    else:
+        when = f"in {days_left} days"
+    return Notification(
+        user_id=user_id,
+        scholarship_id=scholarship_id,
+        notification_type=notification_type,
+        title=TITLES[notification_type].format(title=title)[:255],
+        message=f"The application deadline for {title} is {when} ({deadline:%B %d, %Y}).",
+        dedupe_key=dedupe_key(notification_type, scholarship_id, user_id, deadline),
+    )
+
+
+def _flush(chunk, stats, dry_run, started, progress):
+    # A dry run counts what would be created
+    created = len(missing_notifications(chunk)) if dry_run else create_missing_notifications(chunk)
+    stats['scanned'] += len(chunk)
+    stats['created'] += created
+    stats['skipped'] += len(chunk) - created
+    if progress is not None:
+        elapsed = time.perf_counter() - started
+        progress(f"{stats['scanned']} bookmarks scanned, {stats['created']} notifications created "
+                 f"({stats['scanned'] / elapsed:,.0f} rows/s)")
+
+
+def generate_deadline_notifications(today=None, chunk_size=5000, dry_run=False, progress=None):
+    """Create due deadline reminders; returns a stats dict"""
+    from scholarships.models import BookmarkedScholarship
+
+    today = today or timezone.localdate()
+    horizon = today + timedelta(days=DEADLINE_WINDOWS[-1][1])
+    due = (
+        BookmarkedScholarship.objects.filter(
+            scholarship__is_active=True,
+            scholarship__deadline__gte=today,
+            scholarship__deadline__lte=horizon,
+        )
+        .order_by()
+        .values_list('user_id', 'scholarship_id', 'scholarship__title', 'scholarship__deadline')
+    )
+    stats = {'scanned': 0, 'created': 0, 'skipped': 0}
+    started = time.perf_counter()
+    chunk = []
+    for user_id, scholarship_id, title, deadline in due.iterator(chunk_size=chunk_size):
+        chunk.append(build_notification(user_id, scholarship_id, title, deadline, today))
+        if len(chunk) >= chunk_size:
+            _flush(chunk, stats, dry_run, started, progress)
+            chunk = []
+    if chunk:
+        _flush(chunk, stats, dry_run, started, progress)
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['scanned'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
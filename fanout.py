@@ -0,0 +1,131 @@
+"""
+new_scholarship notifications for every user matching a published scholarship
+
+Matching users are streamed in id order with a server-side cursor (program
+level and CGPA are filtered in SQL, country / field tokens in Python with the
+recommendation features) and notified with chunked bulk inserts. After each
+chunk the last scanned user id is stored on a ScholarshipFanout row in the
+same transaction, so an interrupted run resumes where it stopped; dedupe keys
+make overlapping runs harmless. Scanning is throttled to
+NEW_SCHOLARSHIP_FANOUT_RATE users per second so a large fan-out does not
+starve interactive queries.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Notification, ScholarshipFanout, User
+from .notifications import create_missing_notifications
+from .recommendations import scholarship_features, score, user_features
+
+
+DEFAULT_RATE = 2000
+
+
+def dedupe_key(scholarship_id, user_id):
+    return f"new_scholarship:{scholarship_id}:{user_id}"
+
+
+def matches(user_vector, features):
+    """Eligible, and sharing the program level or a country / field token"""
+    if score(user_vector, features) is None:
+        return False
+    return bool(
+        (user_vector.program_level and user_vector.program_level == features.program_level)
+        or user_vector.country_tokens & features.country_tokens
+        or user_vector.field_tokens & features.field_tokens
+    )
+
+
+def _candidates(features, after_id):
+    users = User.objects.filter(is_active=True, pk__gt=after_id)
+    if features.program_level:
+        # A smallint comparison; levels users cannot have match no code
+        users = users.filter(Q(program_level=features.program_level) | Q(program_level__isnull=True))
+    if features.min_cgpa is not None:
+        users = users.filter(Q(cgpa__gte=features.min_cgpa) | Q(cgpa__isnull=True))
+    return users.order_by('pk').values('pk', 'program_level', 'preferred_country', 'field_of_study', 'cgpa')
+
+
+def build_notification(user_id, scholarship):
+    return Notification(
+        user_id=user_id,
+        scholarship_id=scholarship.pk,
+        notification_type='new_scholarship',
+        title=f"New scholarship: {scholarship.title}"[:255],
+        message=f"{scholarship.title} matches your profile. Take a look before the deadline!",
+        dedupe_key=dedupe_key(scholarship.pk, user_id),
+    )
+
+
+class _Throttle:
+    """Sleep so that ``rate`` items per second are not exceeded (0 disables)"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.started = time.perf_counter()
+        self.done = 0
+
+    def wait(self, items):
+        self.done += items
+        if not self.rate:
+            return
+        ahead = self.done / self.rate - (time.perf_counter() - self.started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def _save_chunk(fanout, notifications, last_user_id):
+    with transaction.atomic():
+        created = create_missing_notifications(notifications) if notifications else 0
+        ScholarshipFanout.objects.filter(pk=fanout.pk).update(
+            last_user_id=last_user_id,
+            notified_count=F('notified_count') + created,
+            updated_at=timezone.now(),
+        )
+    return created
+
+
+def fan_out_new_scholarship(scholarship_id, chunk_size=2000, rate=None, progress=None):
+    """Notify every matching user, resuming from the stored checkpoint; returns a stats dict"""
+    from scholarships.models import Scholarship
+
+    stats = {'scanned': 0, 'created': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+    scholarship = Scholarship.objects.filter(pk=scholarship_id, is_active=True).first()
+    if scholarship is None:
+        return stats
+    fanout, _ = ScholarshipFanout.objects.get_or_create(scholarship=scholarship)
+    if fanout.completed_at is not None:
+        return stats
+    if rate is None:
+        rate = getattr(settings, 'NEW_SCHOLARSHIP_FANOUT_RATE', DEFAULT_RATE)
+
+    features = scholarship_features(scholarship)
+    throttle = _Throttle(rate)
+    started = time.perf_counter()
+    chunk = []
+    scanned = 0
+    last_user_id = fanout.last_user_id
+    rows = _candidates(features, fanout.last_user_id).iterator(chunk_size=chunk_size)
+    for row in rows:
+        if matches(user_features(row), features):
+            chunk.append(build_notification(row['pk'], scholarship))
+        scanned += 1
+        last_user_id = row['pk']
+        if scanned == chunk_size:
+            stats['created'] += _save_chunk(fanout, chunk, last_user_id)
+            stats['scanned'] += scanned
+            if progress is not None:
+                progress(f"{stats['scanned']} users scanned, {stats['created']} notified")
+            throttle.wait(scanned)
+            chunk, scanned = [], 0
+    stats['created'] += _save_chunk(fanout, chunk, last_user_id)
+    stats['scanned'] += scanned
+    ScholarshipFanout.objects.filter(pk=fanout.pk).update(completed_at=timezone.now())
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['scanned'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
@@ -0,0 +1,54 @@
+"""
+Password hashers tuned for login throughput
+
+Django's default PBKDF2 (600k iterations) and Argon2 (100 MiB, 2 passes, 8
+lanes) each burn a few hundred ms of CPU per login. These subclasses keep the
+algorithm identifiers of Django's Argon2 / scrypt hashers, so hashes stay
+readable by stock Django, with parameters taken from settings: Argon2id
+defaults to OWASP's minimum (19 MiB, 2 passes, 1 lane, ~7x cheaper), scrypt
+to Django's N=2^14, r=8, p=1. To use them, list the preferred one first and
+keep the old hashers for verification:
+
+    PASSWORD_HASHERS = [
+        'accounts.hashers.TunedArgon2PasswordHasher',
+        'accounts.hashers.TunedScryptPasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ]
+
+Existing users are moved over transparently: when a stored hash uses another
+algorithm or other parameters, a successful ``check_password()`` (and so
+``authenticate()``) re-encodes it with the first hasher and saves it.
+``benchmarks/password_hashing.py`` reports logins per second per core for
+each setting. Argon2 needs ``argon2-cffi``.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+def _params(setting, defaults):
+    params = dict(defaults)
+    params.update(getattr(settings, setting, {}))
+    return params
+
+
+# Argon2id, 19 MiB, 2 passes, 1 lane
+ARGON2_DEFAULTS = {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1}
+# N=2^14, r=8, p=1: 16 MiB per hash; cost grows linearly with N * p
+SCRYPT_DEFAULTS = {'work_factor': 2 ** 14, 'block_size': 8, 'parallelism': 1}
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with PASSWORD_ARGON2_PARAMS (time_cost, memory_cost in KiB, parallelism)"""
+    _tuned = _params('PASSWORD_ARGON2_PARAMS', ARGON2_DEFAULTS)
+    time_cost = _tuned['time_cost']
+    memory_cost = _tuned['memory_cost']
+    parallelism = _tuned['parallelism']
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with PASSWORD_SCRYPT_PARAMS (work_factor, block_size, parallelism)"""
+    _tuned = _params('PASSWORD_SCRYPT_PARAMS', SCRYPT_DEFAULTS)
+    work_factor = _tuned['work_factor']
+    block_size = _tuned['block_size']
+    parallelism = _tuned['parallelism']
@@ -45,5 +45,5 @@ if ($venvPath -eq "..\venv") {
 }
 Write-Host ""
 Write-Host "Or use venv's Python directly:" -ForegroundColor Cyan
-Write-Host "  $venvPath\Scripts\python.exe manage.py runserver" -ForegroundColor White
+Write-Host "  $venvPath\Scripts\python.exe -m uvicorn asgi:application --reload" -ForegroundColor White
 
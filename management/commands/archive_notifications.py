@@ -0,0 +1,80 @@
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Notification, NotificationArchive
+from accounts.notifications import adjust_unread_many
+
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'notification_type', 'title', 'message', 'scholarship_id', 'created_at', 'read_at',
+)
+
+
+class Command(BaseCommand):
+    help = 'Move read notifications older than --days into the archive table (or a gzipped JSONL file)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 180),
+            help='Archive read notifications older than this many days',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+        parser.add_argument('--to-file', help='Append to this .jsonl.gz file instead of the archive table')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        eligible = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+        total = eligible.count()
+        self.stdout.write(f"{total} read notifications older than {cutoff:%Y-%m-%d} eligible for archival")
+        if options['dry_run'] or not total:
+            return
+
+        batch_size = options['batch_size']
+        archive_file = gzip.open(options['to_file'], 'at', encoding='utf-8') if options['to_file'] else None
+        archived = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                # Short transactions: each batch locks at most batch_size rows.
+                # Locked when read, so none can be resent as unread before the
+                # delete below.
+                with transaction.atomic():
+                    rows = list(
+                        eligible.select_for_update().order_by('created_at').values(*ARCHIVE_FIELDS)[:batch_size]
+                    )
+                    if not rows:
+                        break
+                    if archive_file is not None:
+                        for row in rows:
+                            archive_file.write(json.dumps(row, default=str) + '\n')
+                    else:
+                        NotificationArchive.objects.bulk_create(
+                            [NotificationArchive(**row) for row in rows], ignore_conflicts=True
+                        )
+                    eligible.filter(pk__in=[row['id'] for row in rows]).delete()
+                    # Read rows leave the unread counter alone but change the listing
+                    adjust_unread_many({row['user_id']: 0 for row in rows})
+                archived += len(rows)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"Archived {archived}/{total} ({archived / total:.0%}, {archived / elapsed:,.0f} rows/s)"
+                )
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+        finally:
+            if archive_file is not None:
+                archive_file.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} notifications in {elapsed:.1f}s"))
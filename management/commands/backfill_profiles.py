@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import User, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Create the missing UserProfile rows in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Only count users without a profile')
+
+    def handle(self, *args, **options):
+        missing = User.objects.filter(profile__isnull=True)
+        if options['dry_run']:
+            self.stdout.write(f"{missing.count()} users have no profile")
+            return
+        batch_size = options['batch_size']
+        # Inserts skip users that got a profile concurrently (e.g. by a signup)
+        # and cannot tell how many they skipped, so only attempts are counted
+        attempted = 0
+        last_pk = 0
+        while True:
+            batch = list(missing.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            UserProfile.objects.bulk_create(
+                [UserProfile(user_id=pk) for pk in batch], batch_size=batch_size, ignore_conflicts=True
+            )
+            attempted += len(batch)
+            self.stdout.write(f"Attempted {attempted} profiles")
+        self.stdout.write(self.style.SUCCESS(
+            f"Attempted {attempted} missing profiles; {missing.count()} users still have no profile"
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.fanout import DEFAULT_RATE, fan_out_new_scholarship
+from accounts.models import ScholarshipFanout
+
+
+class Command(BaseCommand):
+    help = 'Send new_scholarship notifications to matching users, resuming interrupted fan-outs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scholarship_ids', nargs='*', type=int)
+        parser.add_argument('--resume', action='store_true', help='Finish every incomplete fan-out')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--rate', type=int, default=None,
+            help=f"Max users scanned per second, 0 for unlimited (default NEW_SCHOLARSHIP_FANOUT_RATE or {DEFAULT_RATE})",
+        )
+
+    def handle(self, *args, **options):
+        if not options['scholarship_ids'] and not options['resume']:
+            raise CommandError('Pass scholarship ids and/or --resume')
+        scholarship_ids = list(options['scholarship_ids'])
+        if options['resume']:
+            scholarship_ids += ScholarshipFanout.objects.filter(
+                completed_at__isnull=True
+            ).values_list('scholarship_id', flat=True)
+        if not scholarship_ids:
+            self.stdout.write('No incomplete fan-outs to resume')
+            return
+
+        for scholarship_id in dict.fromkeys(scholarship_ids):
+            stats = fan_out_new_scholarship(
+                scholarship_id,
+                chunk_size=options['chunk_size'],
+                rate=options['rate'],
+                progress=self.stdout.write,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Scholarship {scholarship_id}: scanned {stats['scanned']} users in {stats['seconds']:.1f}s "
+                f"({stats['rows_per_second']:,.0f} rows/s), {stats['created']} notified"
+            ))
@@ -0,0 +1,34 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.deadlines import generate_deadline_notifications
+
+
+class Command(BaseCommand):
+    help = 'Create deadline_approaching / deadline_soon / deadline_today notifications for bookmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--date', help='Treat this day (YYYY-MM-DD) as today')
+        parser.add_argument('--dry-run', action='store_true', help='Scan without writing notifications')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+        stats = generate_deadline_notifications(
+            today=today,
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            progress=self.stdout.write,
+        )
+        created = 'would be created' if options['dry_run'] else 'created'
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {stats['scanned']} bookmarks in {stats['seconds']:.1f}s "
+            f"({stats['rows_per_second']:,.0f} rows/s): {stats['created']} {created}, "
+            f"{stats['skipped']} already sent"
+        ))
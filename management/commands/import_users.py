@@ -0,0 +1,70 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import passwords
+from accounts.onboarding import FORMATS, guess_format, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Create users and profiles from a CSV or JSONL file (signup form field names)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV / JSONL file, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension (csv)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--errors', help='Write failed rows (line, email, error) to this CSV file')
+        parser.add_argument('--without-passwords', action='store_true',
+                            help='Ignore password columns; accounts get unusable passwords until reset')
+        parser.add_argument('--welcome-email', action='store_true', help='Queue the welcome email for each user')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the rows')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        try:
+            source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        errors_file = errors = None
+        if options['errors']:
+            errors_file = open(options['errors'], 'w', newline='', encoding='utf-8')
+            errors = csv.writer(errors_file)
+            errors.writerow(['line', 'email', 'error'])
+        shown = []
+
+        def on_failure(line, email, message):
+            if errors is not None:
+                errors.writerow([line, email, message])
+            elif len(shown) < 20:
+                shown.append(f"  line {line} {email}: {message}")
+
+        def progress(importer):
+            self.stdout.write(f"{importer.read} rows read, {importer.created} created, {importer.failed} failed")
+
+        try:
+            importer = import_users(
+                read_rows(source, fmt),
+                chunk_size=options['chunk_size'],
+                progress=progress,
+                without_passwords=options['without_passwords'],
+                welcome_email=options['welcome_email'],
+                dry_run=options['dry_run'],
+                on_failure=on_failure,
+            )
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if errors_file is not None:
+                errors_file.close()
+            passwords.shutdown()
+
+        seconds = importer.seconds
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {importer.created} of {importer.read} rows in {seconds:.2f}s "
+            f"({importer.read / seconds if seconds else 0:,.0f} rows/s), {importer.failed} failed"
+        ))
+        if shown:
+            self.stdout.write('First failures:\n' + '\n'.join(shown))
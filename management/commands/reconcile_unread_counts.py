@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from accounts.models import User
+from accounts.notifications import recount_unread, unread_count_subquery
+
+
+class Command(BaseCommand):
+    help = 'Repair drift in the denormalized unread-notification counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        checked = drifted = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+            wrong = list(
+                User.objects.filter(pk__in=batch)
+                .annotate(actual=unread_count_subquery())
+                .exclude(unread_notifications_count=F('actual'))
+                .values_list('pk', 'unread_notifications_count', 'actual')
+            )
+            for pk, stored, actual in wrong:
+                self.stdout.write(f"user {pk}: stored {stored}, actual {actual}")
+            if wrong and not dry_run:
+                recount_unread(User.objects.filter(pk__in=[pk for pk, _, _ in wrong]))
+            drifted += len(wrong)
+        action = 'found' if dry_run else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} users, {action} {drifted} drifted counters"))
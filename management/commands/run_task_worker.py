@@ -0,0 +1,79 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from accounts import taskqueue
+
+
+def _serve(options):
+    """Entry point of one worker process"""
+    import django
+
+    django.setup()
+    stopping = []
+    # Finish the current task, then exit
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *args: stopping.append(True))
+    return taskqueue.work(
+        burst=options['burst'],
+        poll_interval=options['poll_interval'],
+        max_tasks=options['max_tasks'],
+        should_stop=lambda: bool(stopping),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Run background task workers against the database task queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--max-tasks', type=int, default=None, help='Exit after this many tasks per process')
+        parser.add_argument(
+            '--purge-days', type=int, default=None,
+            help='First delete succeeded tasks finished more than this many days ago',
+        )
+        parser.add_argument('--stats', action='store_true', help='Print per-task metrics and exit')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_stats()
+            return
+        if options['processes'] < 1:
+            raise CommandError('--processes must be at least 1')
+        if options['purge_days'] is not None:
+            purged = taskqueue.purge_finished(options['purge_days'])
+            self.stdout.write(f"Purged {purged} finished tasks")
+
+        if options['processes'] == 1:
+            processed = _serve(options)
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} tasks"))
+            return
+        # Children must not share the parent's database connection
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=_serve, args=(options,), name=f"task-worker-{i}")
+            for i in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} worker processes")
+        for worker in workers:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS('All workers exited'))
+
+    def print_stats(self):
+        stats = taskqueue.task_stats()
+        if not stats:
+            self.stdout.write('No tasks recorded')
+            return
+        for name, row in stats.items():
+            avg = f"{row['avg_ms']:.1f}" if row['avg_ms'] is not None else '-'
+            peak = f"{row['max_ms']:.1f}" if row['max_ms'] is not None else '-'
+            self.stdout.write(
+                f"{name}: {row['queued']} queued, {row['running']} running, {row['succeeded']} succeeded, "
+                f"{row['failed']} failed, {row['retried']} retried; avg {avg} ms, max {peak} ms"
+            )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from accounts.requirement_rules import apply_rules
+
+
+class Command(BaseCommand):
+    help = ('Give scholarships without required documents the requirements from the rules '
+            '(documents and forms) and enable internal applications')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the scholarships that would change')
+        parser.add_argument('--overwrite', action='store_true',
+                            help='Also replace requirements that are already set (e.g. edited in the admin) '
+                                 'wherever they differ from the rules')
+
+    def handle(self, *args, **options):
+        stats = apply_rules(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            overwrite=options['overwrite'],
+        )
+        seconds = stats['seconds']
+        verb = 'Would update' if options['dry_run'] else 'Updated'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} requirements of {stats['updated']} and only enabled internal application on "
+            f"{stats['enabled']} of {stats['scanned']} scholarships ({stats['combinations']} rule combinations, "
+            f"{stats['updates']} UPDATEs) in {seconds:.2f}s ({stats['scanned'] / seconds if seconds else 0:,.0f} rows/s)"
+        ))
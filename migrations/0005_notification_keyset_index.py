@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+from accounts.operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    # Concurrent index builds cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0004_user_notifications_version'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+
+from accounts.operations import AddIndexConcurrentlyIfSupported, RemoveIndexConcurrentlyIfSupported
+
+
+# Name Django generated for the user FK index in 0001_initial
+USER_FK_INDEX = 'notifications_user_id_468e288d'
+
+
+class Migration(migrations.Migration):
+    # Concurrent index builds cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0005_notification_keyset_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='notification',
+            index=models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_read=False),
+                name='notif_user_unread_idx',
+            ),
+        ),
+        # The single-column FK index is a prefix of the composite indexes.
+        # Name it in the state so it can be dropped concurrently, then mark
+        # the field unindexed without touching the database again.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='notification',
+                    index=models.Index(fields=['user'], name=USER_FK_INDEX),
+                ),
+            ],
+        ),
+        RemoveIndexConcurrentlyIfSupported(model_name='notification', name=USER_FK_INDEX),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='notification',
+                    name='user',
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=models.deletion.CASCADE,
+                        related_name='notifications',
+                        to='accounts.user',
+                    ),
+                ),
+            ],
+        ),
+    ]
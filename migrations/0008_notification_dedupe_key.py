@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+# The name Django gives the unique constraint of Notification.dedupe_key
+UNIQUE_INDEX = 'notifications_dedupe_key_433c91e2_uniq'
+
+
+def add_unique_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'CREATE UNIQUE INDEX {concurrently}{UNIQUE_INDEX} ON notifications (dedupe_key)')
+
+
+def drop_unique_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS {UNIQUE_INDEX}')
+
+
+class Migration(migrations.Migration):
+    # Concurrent index builds cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0007_notification_archive'),
+    ]
+
+    # The column is added without a constraint (instant on PostgreSQL), then
+    # made unique by an index built without locking the table
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='notification',
+                    name='dedupe_key',
+                    field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+                ),
+            ],
+            database_operations=[
+                migrations.AddField(
+                    model_name='notification',
+                    name='dedupe_key',
+                    field=models.CharField(blank=True, max_length=100, null=True),
+                ),
+                migrations.RunPython(add_unique_index, drop_unique_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scholarships', '__first__'),
+        ('accounts', '0008_notification_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScholarshipFanout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_user_id', models.BigIntegerField(default=0)),
+                ('notified_count', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('scholarship', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fanout', to='scholarships.scholarship')),
+            ],
+            options={
+                'verbose_name': 'Scholarship Fan-out',
+                'verbose_name_plural': 'Scholarship Fan-outs',
+                'db_table': 'scholarship_fanouts',
+            },
+        ),
+    ]
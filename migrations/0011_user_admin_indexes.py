@@ -0,0 +1,53 @@
+from django.db import migrations, models
+
+from accounts.operations import AddIndexConcurrentlyIfSupported
+
+
+# Search indexes behind UserAdmin.get_search_results on PostgreSQL. The
+# expressions must stay identical to what Django generates for
+# __istartswith / __icontains (UPPER(col::text) LIKE UPPER(...)).
+SEARCH_INDEXES = [
+    ('users_email_prefix_idx', 'USING btree (UPPER(email::text) text_pattern_ops)'),
+    ('users_username_prefix_idx', 'USING btree (UPPER(username::text) text_pattern_ops)'),
+    ('users_full_name_trgm_idx', 'USING gin (UPPER(full_name::text) gin_trgm_ops)'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in SEARCH_INDEXES:
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON users {definition}')
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # Concurrent index builds cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0010_task'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='user',
+            index=models.Index(fields=['-created_at'], name='users_created_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='user',
+            index=models.Index(fields=['program_level', '-created_at'], name='users_level_created_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='user',
+            index=models.Index(fields=['country', '-created_at'], name='users_country_created_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
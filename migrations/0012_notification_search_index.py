@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+# GIN index behind NotificationAdmin search on PostgreSQL. The expression must
+# stay identical to search.TextMatch(('title', 'message'), ...).
+INDEX = (
+    'notifications_search_fts_idx',
+    "USING gin (to_tsvector('simple'::regconfig, COALESCE(title, '') || ' ' || COALESCE(message, '')))",
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    name, definition = INDEX
+    schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON notifications {definition}')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {INDEX[0]}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0011_user_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,172 @@
+from django.db import migrations, models
+from django.db.models import Case, Count, F, SmallIntegerField, Value, When
+from django.db.models.functions import Lower, Trim
+from django.db.models.lookups import In
+
+import accounts.choices
+
+
+# Frozen copies of the accounts.choices entries at the time of this migration
+PREFERRED_PROGRAM_LEVELS = [
+    (1, 'bachelors', "Bachelor's Degree"),
+    (2, 'masters', "Master's Degree"),
+    (3, 'phd', 'PhD/Doctorate'),
+    (4, 'diploma', 'Diploma/Certificate'),
+    (5, 'postgraduate-diploma', 'Postgraduate Diploma'),
+    (6, 'exchange-program', 'Exchange Program'),
+    (7, 'summer-school', 'Summer School'),
+    (8, 'research-fellowship', 'Research Fellowship'),
+]
+CODED_FIELDS = {
+    'program_level': PREFERRED_PROGRAM_LEVELS[:4],
+    'preferred_program_level': PREFERRED_PROGRAM_LEVELS,
+    'budget_range': [
+        (1, 'under-10000', 'Under $10,000'),
+        (2, '10000-25000', '$10,000 - $25,000'),
+        (3, '25000-50000', '$25,000 - $50,000'),
+        (4, '50000-100000', '$50,000 - $100,000'),
+        (5, 'over-100000', 'Over $100,000'),
+        (6, 'full-scholarship', 'Full Scholarship Required'),
+        (7, 'partial-scholarship', 'Partial Scholarship Acceptable'),
+        (8, 'no-budget-limit', 'No Budget Limit'),
+    ],
+    'study_duration': [
+        (1, '1-year', '1 Year'),
+        (2, '2-years', '2 Years'),
+        (3, '3-years', '3 Years'),
+        (4, '4-years', '4 Years'),
+        (5, '5-years', '5+ Years'),
+        (6, 'flexible', 'Flexible'),
+    ],
+}
+
+# Other spellings seen in the free-text columns (besides slugs and labels),
+# compared trimmed and lowercased
+ALIASES = {
+    'program_level': {
+        1: ['bachelor', "bachelor's", 'bachelors degree', 'undergraduate', 'bs', 'bsc', 'ba'],
+        2: ['master', "master's", 'masters degree', 'graduate', 'ms', 'msc', 'ma', 'mphil'],
+        3: ['doctorate', 'doctoral', 'ph.d', 'ph.d.', 'phd/doctorate'],
+        4: ['certificate', 'diploma/certificate'],
+    },
+    'budget_range': {
+        1: ['under 10000', 'under $10000', '<10000', '0-10000'],
+        2: ['10000 - 25000', '$10000-$25000'],
+        3: ['25000 - 50000', '$25000-$50000'],
+        4: ['50000 - 100000', '$50000-$100000'],
+        5: ['over 100000', 'over $100000', '>100000', '100000+'],
+        6: ['full scholarship', 'full'],
+        7: ['partial scholarship', 'partial'],
+        8: ['no budget limit', 'no limit', 'unlimited'],
+    },
+    'study_duration': {
+        1: ['1', '1 year', 'one year', '12 months'],
+        2: ['2', '2 years', 'two years', '24 months'],
+        3: ['3', '3 years', 'three years'],
+        4: ['4', '4 years', 'four years'],
+        5: ['5', '5 years', '5+', '5+ years', 'five years', 'more than 5 years'],
+        6: ['any', 'no preference', 'not sure'],
+    },
+}
+ALIASES['preferred_program_level'] = {
+    **ALIASES['program_level'],
+    5: ['postgraduate diploma', 'post graduate diploma', 'pgd'],
+    6: ['exchange', 'exchange program'],
+    7: ['summer school', 'summer'],
+    8: ['research fellowship', 'fellowship'],
+}
+
+
+def spellings(name):
+    """code -> accepted lowercase spellings of the field's values"""
+    accepted = {}
+    for code, value, label in CODED_FIELDS[name]:
+        accepted[code] = sorted({value, label.lower(), *ALIASES[name].get(code, ())})
+    return accepted
+
+
+def coded_field(name):
+    return accounts.choices.CodedChoiceField(
+        blank=True, coded=accounts.choices.CodedChoices(CODED_FIELDS[name]), null=True
+    )
+
+
+def unmapped_values(User):
+    """{field: [(stored value, users)]} for non-empty values matching no spelling"""
+    unmapped = {}
+    for name in CODED_FIELDS:
+        accepted = [spelling for spellings in spellings(name).values() for spelling in spellings]
+        rows = list(
+            User.objects.annotate(normalized=Lower(Trim(F(name)), output_field=models.CharField()))
+            .exclude(**{f'{name}__isnull': True}).exclude(normalized='')
+            .exclude(normalized__in=accepted)
+            .values_list(name).annotate(users=Count('pk')).order_by('-users')
+        )
+        if rows:
+            unmapped[name] = rows
+    return unmapped
+
+
+def copy_codes(apps, schema_editor):
+    """Fill the code columns from the stored values in one pass over the table
+
+    Refuses to run while any stored value matches no spelling, since the
+    string columns are dropped afterwards: add the spelling to ALIASES or
+    fix those rows, then migrate again.
+    """
+    User = apps.get_model('accounts', 'User')
+    unmapped = unmapped_values(User)
+    if unmapped:
+        listed = '; '.join(
+            f"{name}: " + ', '.join(f'{value!r} ({users})' for value, users in rows[:20])
+            + (f' and {len(rows) - 20} more' if len(rows) > 20 else '')
+            for name, rows in unmapped.items()
+        )
+        raise ValueError(f"Stored values with no code (users in brackets): {listed}")
+    User.objects.update(**{
+        f'{name}_code': Case(
+            *(
+                When(In(Lower(Trim(F(name)), output_field=models.CharField()), accepted), then=Value(code))
+                for code, accepted in spellings(name).items()
+            ),
+            default=None,
+            output_field=SmallIntegerField(),
+        )
+        for name in CODED_FIELDS
+    })
+
+
+def copy_slugs(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    User.objects.update(**{
+        name: Case(
+            *(When(**{f'{name}_code': code}, then=Value(value)) for code, value, _ in entries),
+            default=None,
+            output_field=models.CharField(),
+        )
+        for name, entries in CODED_FIELDS.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_notification_search_index'),
+    ]
+
+    # Add coded columns next to the string ones, copy, drop the strings and
+    # take over their names. The (program_level, created_at) index is rebuilt
+    # on the smallint column by 0014, outside this transaction.
+    operations = [
+        migrations.RemoveIndex(model_name='user', name='users_level_created_idx'),
+        *(
+            migrations.AddField(model_name='user', name=f'{name}_code', field=coded_field(name))
+            for name in CODED_FIELDS
+        ),
+        migrations.RunPython(copy_codes, copy_slugs),
+        *(migrations.RemoveField(model_name='user', name=name) for name in CODED_FIELDS),
+        *(
+            migrations.RenameField(model_name='user', old_name=f'{name}_code', new_name=name)
+            for name in CODED_FIELDS
+        ),
+    ]
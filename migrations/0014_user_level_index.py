@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+from accounts.operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    # Concurrent index builds cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0013_user_coded_choices'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='user',
+            index=models.Index(fields=['program_level', '-created_at'], name='users_level_created_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+# The GIN indexes from 0002; nothing queries scholarships by text any more
+SEARCH_INDEXES = [
+    ('scholarships_field_fts_idx', "USING gin (to_tsvector('simple'::regconfig, COALESCE(field_of_study, '')))"),
+    ('scholarships_field_trgm_idx', 'USING gin (field_of_study gin_trgm_ops)'),
+    ('scholarships_country_fts_idx', "USING gin (to_tsvector('simple'::regconfig, COALESCE(study_country, '')))"),
+    ('scholarships_country_trgm_idx', 'USING gin (study_country gin_trgm_ops)'),
+]
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, definition in SEARCH_INDEXES:
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON scholarships {definition}')
+
+
+class Migration(migrations.Migration):
+    # DROP INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0014_user_level_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_indexes, create_search_indexes),
+    ]
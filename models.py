@@ -1,24 +1,92 @@
+import copy
+
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
 from django.db import models
 
+from .choices import BUDGET_RANGES, PREFERRED_PROGRAM_LEVELS, PROGRAM_LEVELS, STUDY_DURATIONS, CodedChoiceField
+
 
-class User(AbstractUser):
+class TrackedFieldsMixin:
+    """Remembers the saved value of each field, so save() writes only what changed
+
+    ``save()`` without ``update_fields`` on a tracked instance (loaded from or
+    already saved to the database) updates the changed columns plus any
+    ``auto_now`` ones, and issues no query at all when nothing changed.
+    Fields in ``UNTRACKED_FIELDS`` are never written that way.
+    """
+    UNTRACKED_FIELDS = ()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.mark_clean()
+        return instance
+    
+    def mark_clean(self, fields=None):
+        """Treat the current values of ``fields`` (default: all loaded ones) as saved"""
+        saved = self.__dict__.setdefault('_saved_values', {})
+        for field in self._meta.concrete_fields:
+            if fields is not None and field.name not in fields and field.attname not in fields:
+                continue
+            if field.attname in self.__dict__:
+                value = self.__dict__[field.attname]
+                saved[field.attname] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    
+    def changed_fields(self):
+        """Names of the fields changed since loading or saving; None when not tracked"""
+        saved = self.__dict__.get('_saved_values')
+        if saved is None:
+            return None
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.name in self.UNTRACKED_FIELDS or field.attname not in self.__dict__:
+                continue
+            if field.attname not in saved or not _same_value(field, saved[field.attname], self.__dict__[field.attname]):
+                changed.append(field.name)
+        return changed
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            changed = self.changed_fields()
+            if changed is None:
+                changed = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.UNTRACKED_FIELDS
+                ]
+            elif changed:
+                changed += [
+                    field.name for field in self._meta.concrete_fields
+                    if getattr(field, 'auto_now', False) and field.name not in changed
+                ]
+            # Django skips the query (and the signals) for an empty list
+            kwargs['update_fields'] = changed
+        super().save(*args, **kwargs)
+        self.mark_clean(kwargs.get('update_fields'))
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.mark_clean(fields)
+
+
+def _same_value(field, saved, current):
+    if saved == current:
+        return True
+    try:
+        # e.g. a float assigned to a DecimalField
+        return field.to_python(saved) == field.to_python(current)
+    except ValidationError:
+        return False
+
+
+class User(TrackedFieldsMixin, AbstractUser):
     """Custom User model extending Django's AbstractUser"""
     email = models.EmailField(unique=True)
     full_name = models.CharField(max_length=50)
     
     # Academic Information
-    program_level = models.CharField(
-        max_length=50,
-        choices=[
-            ('bachelors', "Bachelor's Degree"),
-            ('masters', "Master's Degree"),
-            ('phd', 'PhD/Doctorate'),
-            ('diploma', 'Diploma/Certificate'),
-        ],
-        blank=True,
-        null=True
-    )
+    # Stored as smallint codes, read and written as slugs (see accounts.choices)
+    program_level = CodedChoiceField(coded=PROGRAM_LEVELS, blank=True, null=True)
     field_of_study = models.CharField(max_length=100, blank=True, null=True)
     cgpa = models.DecimalField(max_digits=4, decimal_places=2, blank=True, null=True)
     grades = models.CharField(max_length=10, blank=True, null=True)
@@ -26,27 +94,17 @@ class User(AbstractUser):
     
     # Study Preferences
     preferred_country = models.CharField(max_length=100, blank=True, null=True)
-    preferred_program_level = models.CharField(
-        max_length=50,
-        choices=[
-            ('bachelors', "Bachelor's Degree"),
-            ('masters', "Master's Degree"),
-            ('phd', 'PhD/Doctorate'),
-            ('diploma', 'Diploma/Certificate'),
-            ('postgraduate-diploma', 'Postgraduate Diploma'),
-            ('exchange-program', 'Exchange Program'),
-            ('summer-school', 'Summer School'),
-            ('research-fellowship', 'Research Fellowship'),
-        ],
-        blank=True,
-        null=True
-    )
-    budget_range = models.CharField(max_length=50, blank=True, null=True)
-    study_duration = models.CharField(max_length=50, blank=True, null=True)
+    preferred_program_level = CodedChoiceField(coded=PREFERRED_PROGRAM_LEVELS, blank=True, null=True)
+    budget_range = CodedChoiceField(coded=BUDGET_RANGES, blank=True, null=True)
+    study_duration = CodedChoiceField(coded=STUDY_DURATIONS, blank=True, null=True)
     
     # Preferences
     newsletter_subscribed = models.BooleanField(default=False)
     
+    # Denormalized counters, maintained by accounts.notifications
+    unread_notifications_count = models.PositiveIntegerField(default=0)
+    notifications_version = models.PositiveIntegerField(default=0)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -54,6 +112,11 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'full_name']
     
+    # Only ever changed with atomic F() updates, never written back from a
+    # possibly stale instance
+    COUNTER_FIELDS = ('unread_notifications_count', 'notifications_version')
+    UNTRACKED_FIELDS = COUNTER_FIELDS
+    
     def __str__(self):
         return self.email
     
@@ -61,9 +124,16 @@ class User(AbstractUser):
         db_table = 'users'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        # The admin changelist's filters, each with its default ordering;
+        # search indexes (prefix, trigram) are PostgreSQL-only, see migration 0011
+        indexes = [
+            models.Index(fields=['-created_at'], name='users_created_idx'),
+            models.Index(fields=['program_level', '-created_at'], name='users_level_created_idx'),
+            models.Index(fields=['country', '-created_at'], name='users_country_created_idx'),
+        ]
 
 
-class UserProfile(models.Model):
+class UserProfile(TrackedFieldsMixin, models.Model):
     """Extended profile information for users"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     phone = models.CharField(max_length=20, blank=True, null=True)
@@ -93,7 +163,8 @@ class Notification(models.Model):
         ('system', 'System Notification'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    # Covered by the composite indexes below, which all lead with user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)
     notification_type = models.CharField(max_length=50, choices=NOTIFICATION_TYPES)
     title = models.CharField(max_length=255)
     message = models.TextField()
@@ -112,12 +183,121 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(null=True, blank=True)
     
+    # Set by generated notifications so re-running a job never duplicates them
+    dedupe_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    
     def __str__(self):
         return f"{self.user.email} - {self.title}"
     
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination: WHERE user_id = ? AND (created_at, id) < (?, ?)
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_id_idx'),
+            # Unread-only lookups (counts, mark-all-read); small because most
+            # notifications end up read
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_read=False),
+                name='notif_user_unread_idx',
+            ),
+            # Oldest-first scan of read notifications for archival
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(is_read=True),
+                name='notif_read_created_idx',
+            ),
+        ]
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
 
+
+class NotificationArchive(models.Model):
+    """Read notifications moved out of the hot table by archive_notifications"""
+    # Same id as the original notification, so re-archiving is idempotent
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    notification_type = models.CharField(max_length=50, choices=Notification.NOTIFICATION_TYPES)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    # Plain id: archived rows must survive the scholarship being deleted
+    scholarship_id = models.BigIntegerField(null=True, blank=True)
+    
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.title} (archived)"
+    
+    class Meta:
+        db_table = 'notification_archive'
+        verbose_name = 'Archived Notification'
+        verbose_name_plural = 'Archived Notifications'
+
+
+class ScholarshipFanout(models.Model):
+    """Progress of the new_scholarship fan-out for one scholarship"""
+    scholarship = models.OneToOneField(
+        'scholarships.Scholarship',
+        on_delete=models.CASCADE,
+        related_name='fanout'
+    )
+    # Users are scanned in id order; everyone up to here has been handled
+    last_user_id = models.BigIntegerField(default=0)
+    notified_count = models.PositiveIntegerField(default=0)
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        state = 'done' if self.completed_at else f"at user {self.last_user_id}"
+        return f"Fan-out for scholarship {self.scholarship_id} ({state})"
+    
+    class Meta:
+        db_table = 'scholarship_fanouts'
+        verbose_name = 'Scholarship Fan-out'
+        verbose_name_plural = 'Scholarship Fan-outs'
+
+
+class Task(models.Model):
+    """A queued call of a registered background task (see accounts.taskqueue)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # Earliest time the task may (re)run; pushed back on retries
+    run_at = models.DateTimeField()
+    
+    # Set while running; a lock past its expiry belongs to a dead worker
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    lock_expires_at = models.DateTimeField(null=True, blank=True)
+    
+    last_error = models.TextField(blank=True, null=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+    
+    class Meta:
+        db_table = 'task_queue'
+        indexes = [
+            # Workers poll for the oldest due task
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
+        verbose_name = 'Task'
+        verbose_name_plural = 'Tasks'
@@ -15,7 +15,7 @@ if ($managePath) {
     Write-Host "✅ Now in: $(Get-Location)" -ForegroundColor Green
     Write-Host ""
     Write-Host "You can now run Django commands:" -ForegroundColor Cyan
-    Write-Host "  python manage.py runserver" -ForegroundColor White
+    Write-Host "  python -m uvicorn asgi:application --reload" -ForegroundColor White
 } else {
     Write-Host "❌ manage.py not found!" -ForegroundColor Red
     Write-Host "Please check the project structure." -ForegroundColor Yellow
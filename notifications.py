@@ -0,0 +1,244 @@
+"""
+Notification writes that keep the per-user unread counter in step
+
+``User.unread_notifications_count`` is adjusted with atomic F() updates so the
+unread-count endpoint can answer from the already loaded user row.
+``reconcile_unread_counts`` repairs any drift. Every write also bumps
+``User.notifications_version``, which the notification endpoints use as their
+ETag, and is pushed to connected clients through accounts.push.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Notification, User
+from .push import notification_event, publish_after_commit, publish_unread_counts
+
+
+def unread_count_etag(request, *args, **kwargs):
+    """ETag for payloads derived only from the user's notifications"""
+    user = request.user
+    return f"n{user.pk}-{user.notifications_version}"
+
+
+def notifications_page_etag(request, *args, **kwargs):
+    """ETag for the notifications page, which also renders profile fields"""
+    user = request.user
+    return f"{unread_count_etag(request)}-{user.updated_at.timestamp():.0f}"
+
+
+def unread_count_subquery(user_ref='pk'):
+    """Correlated COUNT of unread notifications for the outer user row"""
+    counted = (
+        Notification.objects.filter(user=OuterRef(user_ref), is_read=False)
+        .order_by()
+        .values('user')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _record_change(users, delta):
+    users.update(
+        unread_notifications_count=Greatest(F('unread_notifications_count') + delta, Value(0)),
+        notifications_version=F('notifications_version') + 1,
+    )
+
+
+def adjust_unread(user_id, delta):
+    """Atomically add ``delta`` to a user's unread counter (never below zero)
+
+    Also bumps the user's notifications version, so call it for every write.
+    """
+    _record_change(User.objects.filter(pk=user_id), delta)
+
+
+def adjust_unread_many(deltas):
+    """Apply {user_id: delta}, one UPDATE per distinct delta"""
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        _record_change(User.objects.filter(pk__in=user_ids), delta)
+
+
+def bulk_create_notifications(notifications, batch_size=1000, ignore_conflicts=False):
+    """bulk_create() plus the counter updates the post_save hook would do
+
+    With ``ignore_conflicts`` (rows clashing on ``dedupe_key`` are skipped)
+    the inserted rows cannot be told apart, so the counters of every
+    recipient are recounted instead and no per-notification events are pushed.
+    """
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(
+            notifications, batch_size=batch_size, ignore_conflicts=ignore_conflicts
+        )
+        if ignore_conflicts:
+            user_ids = {notification.user_id for notification in notifications}
+            recount_unread(User.objects.filter(pk__in=user_ids))
+            publish_unread_counts(user_ids)
+            return created
+        deltas = Counter()
+        for notification in created:
+            deltas[notification.user_id] += 0 if notification.is_read else 1
+        adjust_unread_many(deltas)
+        for notification in created:
+            publish_after_commit(notification.user_id, notification_event(notification))
+        publish_unread_counts(deltas)
+    return created
+
+
+def missing_notifications(notifications):
+    """The notifications whose ``dedupe_key`` is not stored yet"""
+    keys = [notification.dedupe_key for notification in notifications]
+    existing = set(Notification.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True))
+    return [notification for notification in notifications if notification.dedupe_key not in existing]
+
+
+def create_missing_notifications(notifications):
+    """Insert the notifications whose ``dedupe_key`` is not stored yet; returns how many"""
+    fresh = missing_notifications(notifications)
+    if not fresh:
+        return 0
+    try:
+        bulk_create_notifications(fresh, batch_size=len(fresh))
+    except IntegrityError:
+        # A concurrent writer inserted some of these keys after our check
+        bulk_create_notifications(fresh, batch_size=len(fresh), ignore_conflicts=True)
+    return len(fresh)
+
+
+def recount_unread(users):
+    """Recompute the counter from the notifications table for ``users``"""
+    return users.update(
+        unread_notifications_count=unread_count_subquery(),
+        notifications_version=F('notifications_version') + 1,
+    )
+
+
+def record_edit(notification, old_user_id, was_read):
+    """Record an in-place edit: moves the counters if ``is_read`` or the recipient changed
+
+    Bumps the notifications version of the old and the new recipient.
+    """
+    deltas = Counter()
+    deltas[old_user_id] -= 0 if was_read else 1
+    deltas[notification.user_id] += 0 if notification.is_read else 1
+    adjust_unread_many(deltas)
+    publish_unread_counts(deltas)
+
+
+def mark_read(user, notification_id, read_at):
+    """Mark one notification read; returns False when it does not exist"""
+    with transaction.atomic():
+        updated = Notification.objects.filter(id=notification_id, user=user, is_read=False).update(
+            is_read=True, read_at=read_at
+        )
+        if updated:
+            adjust_unread(user.pk, -1)
+            publish_unread_counts([user.pk])
+            return True
+    return Notification.objects.filter(id=notification_id, user=user).exists()
+
+
+def mark_all_read(user, read_at):
+    with transaction.atomic():
+        updated = Notification.objects.filter(user=user, is_read=False).update(is_read=True, read_at=read_at)
+        if updated:
+            adjust_unread(user.pk, -updated)
+            publish_unread_counts([user.pk])
+    return updated
+
+
+def _lock(queryset):
+    """Lock the rows of ``queryset`` until the surrounding transaction ends
+
+    Taken before counting, so a concurrent mark_read or resend cannot change
+    ``is_read`` between the count and the write that follows it.
+    """
+    # In id order, so concurrent bulk actions lock in the same order
+    list(queryset.select_for_update().order_by('pk').values_list('pk', flat=True))
+
+
+def delete_notifications(user, queryset):
+    """Delete ``queryset`` (already scoped to ``user``) and fix the counter"""
+    with transaction.atomic():
+        _lock(queryset)
+        unread = queryset.filter(is_read=False).count()
+        deleted = queryset.delete()[0]
+        if deleted:
+            adjust_unread(user.pk, -unread)
+        if unread:
+            publish_unread_counts([user.pk])
+    return deleted
+
+
+# Set-based bulk actions (admin): one UPDATE / DELETE for the rows, one GROUP
+# BY for the per-user counter deltas
+
+
+def _count_by_user(queryset, condition):
+    """{user_id: rows matching ``condition``} for every user in ``queryset``"""
+    rows = queryset.order_by().values('user').annotate(matching=Count('pk', filter=condition))
+    return {row['user']: row['matching'] for row in rows}
+
+
+def bulk_mark_read(queryset):
+    """Mark the unread notifications in ``queryset`` read; returns how many"""
+    with transaction.atomic():
+        unread = queryset.filter(is_read=False)
+        _lock(unread)
+        deltas = {user_id: -count for user_id, count in _count_by_user(unread, Q()).items()}
+        updated = unread.update(is_read=True, read_at=timezone.now())
+        adjust_unread_many(deltas)
+        publish_unread_counts(deltas)
+    return updated
+
+
+def bulk_resend(queryset):
+    """Deliver ``queryset`` again: marked unread and pushed to each recipient
+
+    ``created_at`` is kept, so resent rows stay where they were in each list.
+    """
+    with transaction.atomic():
+        _lock(queryset)
+        deltas = _count_by_user(queryset, Q(is_read=True))
+        updated = queryset.update(is_read=False, read_at=None)
+        adjust_unread_many(deltas)
+        for notification in queryset.iterator(chunk_size=2000):
+            publish_after_commit(notification.user_id, notification_event(notification))
+        publish_unread_counts(deltas)
+    return updated
+
+
+def release_unread(queryset):
+    """Take the unread rows in ``queryset`` off their users' counters
+
+    For deletes that bypass this module, such as the cascade from a deleted
+    scholarship; call it before the rows go.
+    """
+    deltas = {user_id: -count for user_id, count in _count_by_user(queryset, Q(is_read=False)).items()}
+    adjust_unread_many(deltas)
+    publish_unread_counts(deltas)
+
+
+def bulk_delete(queryset):
+    """Delete ``queryset`` across users and fix their counters; returns how many"""
+    with transaction.atomic():
+        _lock(queryset)
+        deltas = {user_id: -count for user_id, count in _count_by_user(queryset, Q(is_read=False)).items()}
+        deleted = queryset.delete()[0]
+        adjust_unread_many(deltas)
+        publish_unread_counts(deltas)
+    return deleted
+
+
+BULK_ACTIONS = {
+    'mark_read': bulk_mark_read,
+    'resend': bulk_resend,
+    'delete': bulk_delete,
+}
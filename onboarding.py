@@ -0,0 +1,239 @@
+"""
+Creating accounts in bulk: streaming CSV / JSONL import and export
+
+Rows use the signup form's field names (``email``, ``full-name``,
+``password``, ``program-level``, ...; ``_`` works as well as ``-``) plus the
+profile's ``phone``, ``address`` and ``bio``. ``export_users`` writes the same
+columns (never password hashes), so an export can be imported elsewhere.
+
+``import_users`` works through the rows in chunks. Each row is validated
+with the signup rules. Passwords are hashed across the password pool, then
+one transaction per chunk inserts users and profiles with bulk_create. A
+row that fails is reported and skipped, and never aborts the rest.
+"""
+import csv
+import json
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.db import DataError, IntegrityError, transaction
+
+from . import passwords, tasks
+from .models import User, UserProfile
+from .validators import IMPORT_FORM, IMPORT_FORM_WITHOUT_PASSWORD, first_error, validate
+
+
+# Export column -> User field (``profile__`` for UserProfile)
+COLUMNS = {
+    'email': 'email',
+    'full-name': 'full_name',
+    'program-level': 'program_level',
+    'field-of-study': 'field_of_study',
+    'cgpa': 'cgpa',
+    'grades': 'grades',
+    'country': 'country',
+    'preferred-country': 'preferred_country',
+    'preferred-program-level': 'preferred_program_level',
+    'budget-range': 'budget_range',
+    'study-duration': 'study_duration',
+    'newsletter': 'newsletter_subscribed',
+    'phone': 'profile__phone',
+    'address': 'profile__address',
+    'bio': 'profile__bio',
+}
+
+FORMATS = ('csv', 'jsonl')
+
+
+def guess_format(path):
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def build_user(email, password_hash, cleaned, data):
+    """An unsaved User from validated signup (or import) data"""
+    return User(
+        username=User.normalize_username(email),  # Use email as username
+        email=User.objects.normalize_email(email),
+        password=password_hash,
+        full_name=cleaned['full-name'],
+        program_level=data.get('program-level', ''),
+        field_of_study=data.get('field-of-study', ''),
+        cgpa=cleaned['cgpa'],
+        grades=cleaned['grades'],
+        country=data.get('country', ''),
+        preferred_country=data.get('preferred-country', ''),
+        preferred_program_level=data.get('preferred-program-level', ''),
+        budget_range=data.get('budget-range', ''),
+        study_duration=data.get('study-duration', ''),
+        newsletter_subscribed=data.get('newsletter', False) in (True, 'on', 'true', 'True'),
+    )
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict or None, error or None) from ``stream``"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, 'Invalid JSON'
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, 'Expected a JSON object'
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Importer:
+    """Validates, hashes and inserts chunks of rows, keeping the counts"""
+
+    def __init__(self, without_passwords=False, welcome_email=False, dry_run=False, on_failure=None):
+        self.form = IMPORT_FORM_WITHOUT_PASSWORD if without_passwords else IMPORT_FORM
+        self.without_passwords = without_passwords
+        self.welcome_email = welcome_email
+        self.dry_run = dry_run
+        self.on_failure = on_failure
+        self.seen = set()
+        self.read = 0
+        self.created = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def fail(self, line, email, message):
+        self.failed += 1
+        if self.on_failure is not None:
+            self.on_failure(line, email or '', message)
+
+    def clean(self, chunk):
+        """Validated rows of ``chunk`` as (line, email, data), failures reported"""
+        valid = []
+        emails = set()
+        for line, row, error in chunk:
+            self.read += 1
+            if error:
+                self.fail(line, '', error)
+                continue
+            data = {str(key).strip().lower().replace('_', '-'): value for key, value in row.items() if key}
+            if not self.without_passwords:
+                data.setdefault('confirm-password', data.get('password', ''))
+            cleaned, errors = validate(self.form, data)
+            if errors:
+                self.fail(line, data.get('email'), first_error(errors))
+                continue
+            email = User.objects.normalize_email(cleaned['email'])
+            if email in self.seen:
+                self.fail(line, email, 'Duplicate email in this file')
+                continue
+            self.seen.add(email)
+            emails.add(email)
+            valid.append((line, email, {**data, **cleaned}))
+        existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        for line, email, _ in valid:
+            if email in existing:
+                self.fail(line, email, 'Email already exists')
+        return [entry for entry in valid if entry[1] not in existing]
+
+    def build(self, entries):
+        if self.without_passwords:
+            hashes = [make_password(None) for _ in entries]
+        else:
+            hashes = passwords.make_passwords([data['password'] for _, _, data in entries])
+        return [build_user(email, password_hash, data, data)
+                for (_, email, data), password_hash in zip(entries, hashes)]
+
+    def insert(self, entries, users):
+        """Insert a chunk in one transaction; returns False when the database refused it"""
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                if users and users[0].pk is None:
+                    # Backends that cannot return ids from a bulk INSERT
+                    ids = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'pk'))
+                    for user in users:
+                        user.pk = ids[user.email]
+                UserProfile.objects.bulk_create([
+                    UserProfile(user=user, phone=data.get('phone') or None, address=data.get('address') or None,
+                                bio=data.get('bio') or None)
+                    for (_, _, data), user in zip(entries, users)
+                ])
+                if self.welcome_email:
+                    for user in users:
+                        tasks.send_welcome_email.delay(user.pk)
+        except (IntegrityError, DataError):
+            return False
+        self.created += len(users)
+        return True
+
+    def insert_each(self, entries, users):
+        """Row-by-row fallback that isolates the rows the database rejects"""
+        for (line, email, data), user in zip(entries, users):
+            # Undo ids assigned by the rolled back chunk insert
+            user.pk = None
+            user._state.adding = True
+            if not self.insert([(line, email, data)], [user]):
+                self.fail(line, email, 'Rejected by the database (e.g. email registered meanwhile)')
+
+    def import_chunk(self, chunk):
+        entries = self.clean(chunk)
+        if not entries:
+            return
+        if self.dry_run:
+            self.created += len(entries)
+            return
+        users = self.build(entries)
+        if not self.insert(entries, users):
+            self.insert_each(entries, users)
+
+
+def import_users(rows, chunk_size=1000, progress=None, **options):
+    """Import ``rows`` (from ``read_rows``); returns the Importer with its counts
+
+    Options: ``without_passwords`` (unusable passwords, users reset them),
+    ``welcome_email``, ``dry_run`` and ``on_failure(line, email, message)``.
+    """
+    importer = Importer(**options)
+    started = time.perf_counter()
+    for chunk in _chunks(rows, chunk_size):
+        importer.import_chunk(chunk)
+        if progress is not None:
+            progress(importer)
+    importer.seconds = time.perf_counter() - started
+    return importer
+
+
+def export_users(stream, fmt='csv', batch_size=2000):
+    """Write every user with their profile to ``stream``; returns the row count
+
+    Rows are streamed (a server-side cursor on PostgreSQL), never loaded at once.
+    """
+    columns = list(COLUMNS)
+    rows = User.objects.order_by('pk').values_list(*COLUMNS.values()).iterator(chunk_size=batch_size)
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+            count += 1
+    else:
+        for row in rows:
+            stream.write(json.dumps(dict(zip(columns, row)), default=str) + '\n')
+            count += 1
+    return count
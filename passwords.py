@@ -0,0 +1,153 @@
+"""
+Password hashing off the request path, for the async account views
+
+Hashing is CPU-bound: run inline it holds a worker (or, for async views, the
+event loop) for tens to hundreds of milliseconds. Here every hash and check
+runs in a fixed-size process pool of PASSWORD_HASHING_WORKERS processes
+(default: DEFAULT_WORKERS), so a login storm queues on the pool while cheap
+requests keep being served. Every web worker process starts its own pool,
+so a host runs web workers x PASSWORD_HASHING_WORKERS hashing processes;
+size it with that in mind. PASSWORD_HASHING_WORKERS = 0 hashes on a thread
+instead, for tests and development.
+
+``make_passwords`` hashes batches for bulk imports from synchronous code.
+``authenticate`` covers what ModelBackend does for email/password logins,
+including constant-ish timing for unknown emails and rehash-on-login. That
+shortcut only applies while ModelBackend is the sole entry of
+AUTHENTICATION_BACKENDS; with any other setup logins go through
+django.contrib.auth.authenticate on a thread, and hashing is not pooled.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import hashers
+from django.contrib.auth.signals import user_login_failed
+
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+# Per web worker process; the pool is never sized from the CPU count
+DEFAULT_WORKERS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _make_password(password):
+    return hashers.make_password(password)
+
+
+def _check_password(password, encoded):
+    """(valid, needs_rehash) for ``password`` against a stored hash"""
+    outdated = []
+    valid = hashers.check_password(password, encoded, setter=outdated.append)
+    return valid, bool(outdated)
+
+
+def workers():
+    configured = getattr(settings, 'PASSWORD_HASHING_WORKERS', None)
+    if configured is not None:
+        return configured
+    return min(DEFAULT_WORKERS, os.cpu_count() or 1)
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: forking a process that runs an event loop and
+                # threads is unsafe
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers(),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                )
+    return _executor
+
+
+def _discard(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+async def _run(func, *args):
+    if getattr(settings, 'PASSWORD_HASHING_WORKERS', None) == 0:
+        return await sync_to_async(func, thread_sensitive=False)(*args)
+    executor = _pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM kill, ...); start a fresh pool and retry once
+        _discard(executor)
+        return await asyncio.get_running_loop().run_in_executor(_pool(), func, *args)
+
+
+async def make_password(password):
+    return await _run(_make_password, password)
+
+
+def make_passwords(passwords, chunksize=8):
+    """Hash a batch from synchronous code (bulk imports), spread over the pool"""
+    if getattr(settings, 'PASSWORD_HASHING_WORKERS', None) == 0:
+        return [_make_password(password) for password in passwords]
+    executor = _pool()
+    try:
+        return list(executor.map(_make_password, passwords, chunksize=chunksize))
+    except BrokenProcessPool:
+        _discard(executor)
+        return list(_pool().map(_make_password, passwords, chunksize=chunksize))
+
+
+async def check_password(user, password):
+    """Verify ``password`` for ``user``, re-encoding an outdated hash"""
+    valid, needs_rehash = await _run(_check_password, password, user.password)
+    if valid and needs_rehash:
+        user.password = await make_password(password)
+        await user.asave(update_fields=['password'])
+    return valid
+
+
+async def authenticate(request, email, password):
+    """Return the active user for these credentials, or None"""
+    if list(settings.AUTHENTICATION_BACKENDS) != [MODEL_BACKEND]:
+        # Custom backends: let Django try each of them
+        return await sync_to_async(auth.authenticate)(request, username=email, password=password)
+    # Imported here: pool workers import this module before django.setup()
+    from .models import User
+
+    user = await User.objects.filter(**{User.USERNAME_FIELD: email}).afirst()
+    if user is None:
+        # Hash anyway so unknown emails take as long as wrong passwords
+        await make_password(password)
+    elif await check_password(user, password) and user.is_active:
+        user.backend = MODEL_BACKEND
+        return user
+    await sync_to_async(user_login_failed.send)(
+        sender=__name__, credentials={'username': email}, request=request
+    )
+    return None
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
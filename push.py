@@ -0,0 +1,184 @@
+"""
+Server-push delivery of notifications over Server-Sent Events
+
+Notification writes publish small events to a broker; every open
+``/api/notifications/stream/`` connection holds one asyncio queue, so idle
+clients cost a coroutine and a queue rather than a worker thread. That needs
+the ASGI server (asgi.py); under WSGI the view refuses to stream, since the
+response would only be sent once the stream ended.
+
+``LocalBroker`` delivers within one process (development, tests, single
+node). Multi-node deployments point ``NOTIFICATION_BROKER`` at a
+``NotificationBroker`` subclass backed by a shared pub/sub channel.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROKER = 'accounts.push.LocalBroker'
+QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+# Streams end after this long and EventSource reconnects; this bounds the life
+# of subscriptions whose client vanished without the server noticing
+STREAM_MAX_SECONDS = 300
+RECONNECT_MILLISECONDS = 3000
+
+
+class NotificationBroker:
+    """Fan events out to the subscriptions of a user"""
+
+    def publish(self, user_id, event):
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        """Return a Subscription; must be called from the event loop"""
+        raise NotImplementedError
+
+
+class Subscription:
+    """One connected client: an asyncio queue fed by the broker"""
+
+    def __init__(self, broker, user_id, loop):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def offer(self, event):
+        # Runs on the subscriber's loop; a client that stopped reading loses
+        # its oldest events rather than growing the queue without bound
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker(NotificationBroker):
+    """In-process broker; safe to publish from any thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscriptions.get(user_id, ()))
+            return sum(len(s) for s in self._subscriptions.values())
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The connection's loop already shut down
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'NOTIFICATION_BROKER', DEFAULT_BROKER))()
+    return _broker
+
+
+def _publish(user_id, event):
+    try:
+        get_broker().publish(user_id, event)
+    except Exception:
+        # Push is best effort; polling clients still see the change
+        logger.exception('Failed to publish notification event for user %s', user_id)
+
+
+def publish_after_commit(user_id, event):
+    """Publish once the surrounding transaction commits"""
+    transaction.on_commit(lambda: _publish(user_id, event))
+
+
+def notification_payload(notification):
+    """JSON-serializable representation shared by the stream and list APIs"""
+    return {
+        'id': notification.pk,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'scholarship_id': notification.scholarship_id,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+        'read_at': notification.read_at.isoformat() if notification.read_at else None,
+    }
+
+
+def notification_event(notification):
+    return {'type': 'notification', 'notification': notification_payload(notification)}
+
+
+def publish_unread_counts(user_ids):
+    """Push the current unread counter to each user, read in one query"""
+    from .models import User
+
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    counts = User.objects.filter(pk__in=user_ids).values_list('pk', 'unread_notifications_count')
+    for user_id, count in counts:
+        publish_after_commit(user_id, {'type': 'unread_count', 'unread_count': count})
+
+
+def format_event(event):
+    """Serialize an event as an SSE frame"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(subscription, unread_count):
+    """Yield SSE frames for one connection until the client disconnects"""
+    deadline = time.monotonic() + STREAM_MAX_SECONDS
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n"
+        yield format_event({'type': 'unread_count', 'unread_count': unread_count})
+        while time.monotonic() < deadline:
+            try:
+                event = await subscription.get(timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,287 @@
+"""
+Sliding-window rate limiting for the login endpoint
+
+Each (scope, identifier) pair, e.g. ('login-ip', '203.0.113.9'), is limited to
+``limit`` attempts per ``window`` seconds using a sliding-window counter: the
+previous fixed window's count, weighted by how much of it still overlaps the
+sliding window, plus the current window's count. That needs two integers per
+key and O(1) work per check. Rejected attempts are not counted, so a blocked
+client cannot extend its own lockout, and rejecting costs a dict lookup.
+
+``LocalBackend`` keeps counters in process memory (per worker). For limits
+shared between workers, ``RATE_LIMIT_BACKEND = 'accounts.ratelimit.RedisBackend'``
+uses any client with Redis' get / incr / decr / expire / delete / pipeline
+commands (redis-py, from RATE_LIMIT_REDIS_URL); ``LocalRedis`` is an
+in-process stand-in with that interface for tests and development.
+
+Clients are identified by REMOTE_ADDR. Behind reverse proxies, list their
+addresses or networks in ``RATE_LIMIT_TRUSTED_PROXIES`` and the client
+address is taken from X-Forwarded-For, skipping the hops they appended.
+"""
+import ipaddress
+import math
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+DEFAULT_BACKEND = 'accounts.ratelimit.LocalBackend'
+
+# scope -> (attempts, window seconds)
+DEFAULT_LIMITS = {
+    # Credential stuffing: many emails from one address
+    'login-ip': (30, 60),
+    # Password guessing against one account from many addresses
+    'login-email': (10, 900),
+}
+
+# LocalBackend sweeps expired counters once it tracks more keys than this
+MAX_LOCAL_KEYS = 100000
+
+
+def _estimate(current, previous, elapsed, window):
+    return previous * (1 - elapsed / window) + current
+
+
+def _retry_after(current, previous, elapsed, limit, window):
+    """Seconds until one more attempt fits under ``limit``"""
+    if current >= limit or not previous:
+        # Only the next window's decay of this one's count can help
+        return max(1, math.ceil(window - elapsed))
+    # previous * (1 - t / window) + current < limit
+    wait = window * (1 - (limit - current) / previous) - elapsed
+    return max(1, math.ceil(wait))
+
+
+class RateLimitBackend:
+    """Counts attempts per key; ``blocking`` backends do network I/O"""
+    blocking = False
+
+    def hit(self, key, limit, window, now):
+        """Record an attempt; returns 0, or the seconds to wait when over the limit"""
+        raise NotImplementedError
+
+    def reset(self, key, window, now):
+        raise NotImplementedError
+
+
+class LocalBackend(RateLimitBackend):
+    """Per-process counters; safe to use from any thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> [window index, current count, previous count, expires at]
+        self._windows = {}
+        self._sweep_at = MAX_LOCAL_KEYS
+
+    def hit(self, key, limit, window, now):
+        index, elapsed = divmod(now, window)
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None or entry[0] < index - 1:
+                entry = self._windows[key] = [index, 0, 0, 0]
+            elif entry[0] < index:
+                entry[:] = [index, 0, entry[1], 0]
+            if _estimate(entry[1], entry[2], elapsed, window) >= limit:
+                return _retry_after(entry[1], entry[2], elapsed, limit, window)
+            entry[1] += 1
+            # After two windows a count no longer weighs on any estimate
+            entry[3] = (index + 2) * window
+            if len(self._windows) > self._sweep_at:
+                self._windows = {k: e for k, e in self._windows.items() if e[3] > now}
+                # While most keys are live, sweep again only once they double
+                self._sweep_at = max(MAX_LOCAL_KEYS, 2 * len(self._windows))
+        return 0
+
+    def reset(self, key, window, now):
+        with self._lock:
+            self._windows.pop(key, None)
+
+
+class LocalRedis:
+    """In-process stand-in for the Redis commands RedisBackend uses"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+            return None if item is None else str(item[0]).encode()
+
+    def incr(self, key):
+        with self._lock:
+            item = self._live(key)
+            value = (item[0] if item else 0) + 1
+            self._data[key] = [value, item[1] if item else None]
+            return value
+
+    def decr(self, key):
+        with self._lock:
+            item = self._live(key)
+            value = (item[0] if item else 0) - 1
+            self._data[key] = [value, item[1] if item else None]
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            item = self._live(key)
+            if item is None:
+                return False
+            item[1] = time.monotonic() + seconds
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def pipeline(self):
+        return _LocalPipeline(self)
+
+
+class _LocalPipeline:
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self._commands.append((name, args))
+            return self
+        return queue
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        return [getattr(self._client, name)(*args) for name, args in commands]
+
+
+class RedisBackend(RateLimitBackend):
+    """Counters shared by every worker, in Redis (or anything speaking its commands)"""
+    blocking = True
+
+    def __init__(self, client=None, prefix='ratelimit:'):
+        if client is None:
+            url = getattr(settings, 'RATE_LIMIT_REDIS_URL', None)
+            if not url:
+                raise ImproperlyConfigured('RedisBackend needs RATE_LIMIT_REDIS_URL or a client')
+            try:
+                import redis
+            except ImportError:
+                raise ImproperlyConfigured('RedisBackend needs the redis package') from None
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _keys(self, key, index):
+        return f"{self.prefix}{key}:{index:.0f}", f"{self.prefix}{key}:{index - 1:.0f}"
+
+    def hit(self, key, limit, window, now):
+        index, elapsed = divmod(now, window)
+        current_key, previous_key = self._keys(key, index)
+        # Count first, then check: concurrent attempts each see a distinct
+        # count, so no more than ``limit`` get through. Kept for two windows,
+        # as the next one still weighs this count.
+        counted, _, previous = (
+            self.client.pipeline()
+            .incr(current_key).expire(current_key, int(window * 2)).get(previous_key)
+            .execute()
+        )
+        current, previous = int(counted) - 1, int(previous or 0)
+        if _estimate(current, previous, elapsed, window) >= limit:
+            # Rejected attempts are not counted
+            self.client.decr(current_key)
+            return _retry_after(current, previous, elapsed, limit, window)
+        return 0
+
+    def reset(self, key, window, now):
+        self.client.delete(*self._keys(key, now // window))
+
+
+class LocalRedisBackend(RedisBackend):
+    """RedisBackend over LocalRedis: exercises the Redis code path without a server"""
+    blocking = False
+
+    def __init__(self, prefix='ratelimit:'):
+        super().__init__(client=LocalRedis(), prefix=prefix)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(getattr(settings, 'RATE_LIMIT_BACKEND', DEFAULT_BACKEND))()
+    return _backend
+
+
+def limits():
+    configured = dict(DEFAULT_LIMITS)
+    configured.update(getattr(settings, 'LOGIN_RATE_LIMITS', {}))
+    return configured
+
+
+def hit(scope, identifier):
+    """Count an attempt for ``identifier``; returns 0 or the seconds to wait"""
+    limit, window = limits()[scope]
+    return get_backend().hit(f"{scope}:{identifier}", limit, window, time.time())
+
+
+def reset(scope, identifier):
+    limit, window = limits()[scope]
+    get_backend().reset(f"{scope}:{identifier}", window, time.time())
+
+
+async def ahit(scope, identifier):
+    if get_backend().blocking:
+        return await sync_to_async(hit, thread_sensitive=False)(scope, identifier)
+    return hit(scope, identifier)
+
+
+async def areset(scope, identifier):
+    if get_backend().blocking:
+        return await sync_to_async(reset, thread_sensitive=False)(scope, identifier)
+    return reset(scope, identifier)
+
+
+def _trusted(address, proxies):
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(address in network for network in proxies)
+
+
+def client_ip(request):
+    """The peer address, or the client address forwarded by a trusted proxy
+
+    X-Forwarded-For is read right to left and only while the hop that sent it
+    is in RATE_LIMIT_TRUSTED_PROXIES, so clients cannot pick their own key.
+    """
+    address = request.META.get('REMOTE_ADDR') or 'unknown'
+    proxies = [
+        ipaddress.ip_network(proxy, strict=False)
+        for proxy in getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', ())
+    ]
+    if not proxies:
+        return address
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+    while hops and _trusted(address, proxies):
+        address = hops.pop()
+    return address
@@ -0,0 +1,320 @@
+"""
+Scholarship recommendation engine
+
+Every active scholarship is reduced to a small normalized feature vector
+(program level, country tokens, field-of-study tokens, CGPA threshold) held in
+a per-process index. Inverted postings narrow a user's candidates to the
+scholarships sharing their program level, country or field tokens, and scoring
+those is one pass with no database access; only the winning rows are fetched.
+
+Ranked results are memoized per user and invalidated by a catalog version that
+every scholarship write bumps, and by profile updates.
+"""
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+
+from .caches import LRUCache
+from .search import InvertedIndex, tokenize
+
+
+# Scholarship column holding the minimum CGPA, when the catalog defines one
+CGPA_FIELD = 'min_cgpa'
+
+# Score weights; program level and CGPA also act as hard filters
+PROGRAM_LEVEL_WEIGHT = 4.0
+COUNTRY_WEIGHT = 3.0
+FIELD_WEIGHT = 3.0
+CGPA_WEIGHT = 1.0
+FEATURED_BONUS = 0.5
+
+DEFAULT_LIMIT = 6
+
+CATALOG_VERSION_KEY = 'recommendations:catalog_version'
+
+ScholarshipFeatures = namedtuple(
+    'ScholarshipFeatures',
+    ['id', 'program_level', 'country_tokens', 'field_tokens', 'min_cgpa', 'is_featured'],
+)
+UserFeatures = namedtuple(
+    'UserFeatures',
+    ['program_level', 'country_tokens', 'field_tokens', 'cgpa'],
+)
+
+
+def _to_float(value):
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _overlap(wanted, offered):
+    """Share of the user's terms covered by the scholarship (0..1)
+
+    ``wanted`` holds one set of acceptable spellings per user token.
+    """
+    if not wanted or not offered:
+        return 0.0
+    return sum(1 for spellings in wanted if spellings & offered) / len(wanted)
+
+
+def scholarship_features(row):
+    """Build a feature vector from a Scholarship instance or values() dict"""
+    get = row.get if isinstance(row, dict) else lambda name, default=None: getattr(row, name, default)
+    return ScholarshipFeatures(
+        id=get('id'),
+        program_level=(get('program_level') or '').lower() or None,
+        country_tokens=tokenize(get('study_country')),
+        field_tokens=tokenize(get('field_of_study')),
+        min_cgpa=_to_float(get(CGPA_FIELD)),
+        is_featured=bool(get('is_featured', False)),
+    )
+
+
+def user_features(user):
+    """Build the query vector for a user (instance or values() dict) from their academic fields"""
+    get = user.get if isinstance(user, dict) else lambda name: getattr(user, name)
+    return UserFeatures(
+        program_level=(get('program_level') or '').lower() or None,
+        country_tokens=tokenize(get('preferred_country')),
+        field_tokens=tokenize(get('field_of_study')),
+        cgpa=_to_float(get('cgpa')),
+    )
+
+
+def score(user_vector, features, countries=None, fields=None):
+    """Score one scholarship for a user; None means the user is not eligible
+
+    ``countries`` / ``fields`` are the user's tokens expanded to indexed
+    spellings; they default to the exact tokens.
+    """
+    total = 0.0
+    if user_vector.program_level and features.program_level:
+        if user_vector.program_level != features.program_level:
+            return None
+        total += PROGRAM_LEVEL_WEIGHT
+    if features.min_cgpa is not None and user_vector.cgpa is not None:
+        if user_vector.cgpa < features.min_cgpa:
+            return None
+        total += CGPA_WEIGHT
+    if countries is None:
+        countries = [{token} for token in user_vector.country_tokens]
+    if fields is None:
+        fields = [{token} for token in user_vector.field_tokens]
+    total += COUNTRY_WEIGHT * _overlap(countries, features.country_tokens)
+    total += FIELD_WEIGHT * _overlap(fields, features.field_tokens)
+    return total
+
+
+def catalog_version():
+    """Current catalog version, shared between workers through the cache"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached recommendation after a catalog write"""
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 2, None)
+        return 2
+
+
+class _Snapshot:
+    """Feature vectors plus the postings used for candidate generation"""
+
+    def __init__(self):
+        self.features = {}
+        self.levels = defaultdict(set)
+        self.featured = set()
+        self.countries = InvertedIndex()
+        self.fields = InvertedIndex()
+
+    def add(self, vector):
+        self.discard(vector.id)
+        self.features[vector.id] = vector
+        if vector.program_level:
+            self.levels[vector.program_level].add(vector.id)
+        if vector.is_featured:
+            self.featured.add(vector.id)
+        self.countries.add(vector.id, vector.country_tokens)
+        self.fields.add(vector.id, vector.field_tokens)
+
+    def discard(self, scholarship_id):
+        vector = self.features.pop(scholarship_id, None)
+        if vector is None:
+            return
+        self.levels.get(vector.program_level, set()).discard(scholarship_id)
+        self.featured.discard(scholarship_id)
+        self.countries.remove(scholarship_id)
+        self.fields.remove(scholarship_id)
+
+
+class RecommendationIndex:
+    """In-process feature index over the active scholarship catalog"""
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._data = None
+        self._loaded_at = 0.0
+        self._version = None
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'RECOMMENDATION_INDEX_TTL', 300)
+
+    @staticmethod
+    def _model():
+        from scholarships.models import Scholarship
+        return Scholarship
+
+    def _columns(self):
+        model = self._model()
+        columns = ['id', 'program_level', 'study_country', 'field_of_study', 'is_featured']
+        try:
+            model._meta.get_field(CGPA_FIELD)
+        except FieldDoesNotExist:
+            pass
+        else:
+            columns.append(CGPA_FIELD)
+        return columns
+
+    def rebuild(self, version=None):
+        """Reload every active scholarship's features in a single query"""
+        rows = self._model().objects.filter(is_active=True).values(*self._columns())
+        snapshot = _Snapshot()
+        for row in rows.iterator(chunk_size=2000):
+            snapshot.add(scholarship_features(row))
+        with self._lock:
+            self._data = snapshot
+            self._loaded_at = time.monotonic()
+            self._version = version
+        return len(snapshot.features)
+
+    def _snapshot(self, version=None):
+        # Writes seen by other workers show up as a new catalog version; the
+        # TTL bounds staleness when the cache backend is not shared
+        if (
+            self._data is None
+            or (version is not None and version != self._version)
+            or time.monotonic() - self._loaded_at > self.ttl
+        ):
+            self.rebuild(version)
+        return self._data
+
+    def _advance(self, version):
+        # Only keep the snapshot current if no other worker wrote in between
+        if version is None or self._version is None or version != self._version + 1:
+            self._version = None
+        else:
+            self._version = version
+
+    def refresh(self, scholarship, version=None):
+        """Incrementally update one scholarship after it was saved"""
+        if self._data is None:
+            return
+        with self._lock:
+            if scholarship.is_active:
+                self._data.add(scholarship_features(scholarship))
+            else:
+                self._data.discard(scholarship.pk)
+            self._advance(version)
+
+    def discard(self, scholarship_id, version=None):
+        """Drop a deleted scholarship from the index"""
+        if self._data is None:
+            return
+        with self._lock:
+            self._data.discard(scholarship_id)
+            self._advance(version)
+
+    def clear(self):
+        with self._lock:
+            self._data = None
+            self._loaded_at = 0.0
+            self._version = None
+
+    def rank(self, user, limit=DEFAULT_LIMIT, version=None):
+        """Return [(scholarship_id, score)] best first, falling back to featured ones"""
+        vector = user_features(user)
+        snapshot = self._snapshot(version)
+        with self._lock:
+            countries = [snapshot.countries.expand(t) for t in vector.country_tokens]
+            fields = [snapshot.fields.expand(t) for t in vector.field_tokens]
+            candidates = set(snapshot.levels.get(vector.program_level, ()))
+            for spellings in countries:
+                candidates |= snapshot.countries.lookup(frozenset(spellings), fuzzy=False)
+            for spellings in fields:
+                candidates |= snapshot.fields.lookup(frozenset(spellings), fuzzy=False)
+            scored = []
+            for pk in candidates:
+                features = snapshot.features[pk]
+                value = score(vector, features, countries, fields)
+                if value:
+                    if features.is_featured:
+                        value += FEATURED_BONUS
+                    scored.append((value, pk))
+            featured = sorted(snapshot.featured)
+        if scored:
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            return [(pk, round(value, 3)) for value, pk in scored[:limit]]
+        # If no matches, show featured scholarships
+        return [(pk, 0.0) for pk in featured[:limit]]
+
+    def cached_rank(self, user, limit=DEFAULT_LIMIT):
+        """rank() memoized per user, keyed by catalog version and profile fields"""
+        version = catalog_version()
+        stamp = (version, limit, user_features(user))
+        entry = recommendation_cache.get(user.pk, validate=lambda cached: cached[0] == stamp)
+        if entry is not None:
+            return entry[1]
+        ranked = self.rank(user, limit, version=version)
+        recommendation_cache.set(user.pk, (stamp, ranked))
+        return ranked
+
+    def recommend(self, user, limit=DEFAULT_LIMIT):
+        """Fetch the ranked scholarships, each annotated with ``match_score``"""
+        ranked = self.cached_rank(user, limit)
+        if not ranked:
+            return []
+        # A cached ranking can outlive a scholarship's deactivation
+        rows = self._model().objects.filter(is_active=True).in_bulk([pk for pk, _ in ranked])
+        recommended = []
+        for pk, value in ranked:
+            scholarship = rows.get(pk)
+            if scholarship is not None:
+                scholarship.match_score = value
+                recommended.append(scholarship)
+        return recommended
+
+
+def invalidate_user(user_id):
+    """Drop a user's cached recommendations after their profile changed"""
+    recommendation_cache.delete(user_id)
+
+
+def cache_stats():
+    stats = recommendation_cache.stats()
+    stats['catalog_version'] = catalog_version()
+    return stats
+
+
+recommendation_cache = LRUCache(
+    maxsize=getattr(settings, 'RECOMMENDATION_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'RECOMMENDATION_CACHE_TTL', 600),
+)
+recommendation_index = RecommendationIndex()
@@ -0,0 +1,166 @@
+"""
+Scholarship requirement rules, evaluated over the whole catalog in one pass
+
+The required documents and forms of a scholarship follow from its attributes
+through an ordered list of rules (SCHOLARSHIP_REQUIREMENT_RULES, default
+DEFAULT_RULES). A rule has ``when``, a dict of Scholarship column -> value or
+list of values (compared case-insensitively, None matches empty), plus the
+``documents`` and ``forms`` it requires:
+
+  - the first matching rule without ``extra`` is the base template;
+  - every matching rule with ``extra: True`` appends its items, e.g.
+    {'when': {'study_country': 'Germany'}, 'extra': True, 'documents': ['language_certificate']}
+
+Rules only read a few columns, so the catalog has few distinct combinations
+of them. ``apply_rules`` streams those columns, evaluates each combination
+once and updates just the rows whose stored requirements differ, grouped
+into one UPDATE per combination and batch.
+
+By default only scholarships without required documents are filled in:
+requirements edited in the admin are never replaced. ``overwrite`` brings
+every scholarship in line with the rules, e.g. after a rule change (only
+the affected rows are written).
+"""
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+DEFAULT_RULES = [
+    {
+        'when': {'program_level': 'phd'},
+        'documents': ['transcript', 'cv_resume', 'statement_of_purpose', 'research_proposal',
+                      'letters_of_recommendation'],
+        'forms': ['research_interests', 'career_goals'],
+    },
+    {
+        'when': {'program_level': 'masters'},
+        'documents': ['transcript', 'cv_resume', 'statement_of_purpose', 'letters_of_recommendation'],
+        'forms': ['personal_statement'],
+    },
+    {
+        'when': {},
+        'documents': ['transcript', 'cv_resume', 'statement_of_purpose'],
+        'forms': ['personal_statement'],
+    },
+]
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip().lower() or None
+    return value
+
+
+class Rule:
+    def __init__(self, when=None, documents=(), forms=(), extra=False):
+        self.when = {
+            field: frozenset(_normalize(v) for v in (value if isinstance(value, (list, tuple, set)) else [value]))
+            for field, value in (when or {}).items()
+        }
+        self.documents = list(documents)
+        self.forms = list(forms)
+        self.extra = extra
+
+
+class RuleSet:
+    """Compiled rules; ``requirements`` is memoized per combination of the columns they read"""
+
+    def __init__(self, rules):
+        self.rules = [Rule(**rule) for rule in rules]
+        self.fields = tuple(sorted({field for rule in self.rules for field in rule.when}))
+        self._memo = {}
+
+    def key(self, values):
+        """The memo key for a row given as a tuple aligned with ``fields``"""
+        return tuple(_normalize(value) for value in values)
+
+    def requirements(self, key):
+        """(documents, forms) for a combination of ``fields`` values"""
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        row = dict(zip(self.fields, key))
+        documents, forms = [], []
+        base_found = False
+        for rule in self.rules:
+            if rule.extra or not base_found:
+                if all(row[field] in values for field, values in rule.when.items()):
+                    documents += [item for item in rule.documents if item not in documents]
+                    forms += [item for item in rule.forms if item not in forms]
+                    base_found = base_found or not rule.extra
+        result = self._memo[key] = (documents, forms)
+        return result
+
+    @property
+    def combinations(self):
+        """Distinct combinations evaluated so far"""
+        return len(self._memo)
+
+
+def get_rules():
+    return RuleSet(getattr(settings, 'SCHOLARSHIP_REQUIREMENT_RULES', DEFAULT_RULES))
+
+
+def apply_rules(rules=None, batch_size=2000, dry_run=False, overwrite=False, enable_internal=True):
+    """Apply the rules to the catalog; returns counts and timing
+
+    ``overwrite`` also replaces requirements that are already set,
+    ``enable_internal`` also switches on internal applications.
+    """
+    from scholarships.models import Scholarship
+
+    rules = rules or get_rules()
+    stats = {'scanned': 0, 'updated': 0, 'enabled': 0, 'updates': 0}
+    started = time.perf_counter()
+    # update() skips save(), so auto_now columns (updated_at) are stamped by hand
+    stamped = [field.name for field in Scholarship._meta.concrete_fields if getattr(field, 'auto_now', False)]
+    width = len(rules.fields)
+
+    def flush(changed, enable):
+        stats['updated'] += sum(len(pks) for pks in changed.values())
+        stats['enabled'] += len(enable)
+        if dry_run:
+            return
+        stamp = dict.fromkeys(stamped, timezone.now())
+        if enable_internal:
+            stamp['use_internal_application'] = True
+        with transaction.atomic():
+            for key, pks in changed.items():
+                documents, forms = rules.requirements(key)
+                Scholarship.objects.filter(pk__in=pks).update(
+                    required_documents=documents, required_forms=forms, **stamp
+                )
+                stats['updates'] += 1
+            if enable:
+                Scholarship.objects.filter(pk__in=enable).update(**stamp)
+                stats['updates'] += 1
+
+    changed = defaultdict(list)
+    enable = []
+    pending = 0
+    rows = Scholarship.objects.order_by('pk').values_list(
+        'pk', *rules.fields, 'required_documents', 'required_forms', 'use_internal_application'
+    ).iterator(chunk_size=batch_size)
+    for row in rows:
+        stats['scanned'] += 1
+        pk, documents, forms, internal = row[0], row[width + 1], row[width + 2], row[width + 3]
+        key = rules.key(row[1:width + 1])
+        if (overwrite or not documents) and (documents, forms) != rules.requirements(key):
+            changed[key].append(pk)
+            pending += 1
+        elif enable_internal and not internal:
+            enable.append(pk)
+            pending += 1
+        if pending >= batch_size:
+            flush(changed, enable)
+            changed, enable, pending = defaultdict(list), [], 0
+    flush(changed, enable)
+
+    stats['combinations'] = rules.combinations
+    stats['seconds'] = time.perf_counter() - started
+    return stats
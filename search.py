@@ -0,0 +1,131 @@
+"""
+Text matching building blocks
+
+``InvertedIndex`` maps tokens to ids, with trigram expansion for misspelt
+tokens; the recommendation index keeps its country and field-of-study
+postings in it. ``TextMatch`` is a full-text condition that PostgreSQL
+answers from a tsvector GIN index (the admin's notification search).
+"""
+import re
+import threading
+from collections import defaultdict
+
+from django.db.models import BooleanField, F, Func, Value
+
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset({'and', 'of', 'the', 'in', 'for', 'at', 'to'})
+
+TRIGRAM_THRESHOLD = 0.5
+
+
+def tokenize(value):
+    """Split free text or slugs ("computer-science") into lowercase tokens"""
+    if not value:
+        return frozenset()
+    return frozenset(t for t in TOKEN_RE.findall(str(value).lower()) if t not in STOP_WORDS)
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class InvertedIndex:
+    """Token -> ids postings with a trigram -> token map for fuzzy lookups"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(set)
+        self._documents = {}
+        self._trigrams = defaultdict(set)
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, doc_id, text):
+        tokens = text if isinstance(text, frozenset) else tokenize(text)
+        with self._lock:
+            self._remove(doc_id)
+            self._documents[doc_id] = tokens
+            for token in tokens:
+                if token not in self._postings:
+                    for gram in trigrams(token):
+                        self._trigrams[gram].add(token)
+                self._postings[token].add(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for token in self._documents.pop(doc_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[token]
+                for gram in trigrams(token):
+                    self._trigrams[gram].discard(token)
+
+    def expand(self, token):
+        """Vocabulary tokens similar to ``token`` (itself when indexed)"""
+        if token in self._postings:
+            return {token}
+        grams = trigrams(token)
+        overlap = defaultdict(int)
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                overlap[candidate] += 1
+        similar = set()
+        for candidate, shared in overlap.items():
+            union = len(grams) + len(trigrams(candidate)) - shared
+            if shared / union >= TRIGRAM_THRESHOLD:
+                similar.add(candidate)
+        return similar
+
+    def lookup(self, text, fuzzy=True, match_all=False):
+        """Ids of documents containing any (or, with ``match_all``, every) token of ``text``"""
+        tokens = text if isinstance(text, frozenset) else tokenize(text)
+        matches = None
+        with self._lock:
+            for token in tokens:
+                ids = set()
+                for term in self.expand(token) if fuzzy else (token,):
+                    ids |= self._postings.get(term, set())
+                if matches is None:
+                    matches = ids
+                elif match_all:
+                    matches &= ids
+                else:
+                    matches |= ids
+        return matches or set()
+
+
+class TextMatch(Func):
+    """``to_tsvector('simple', col) @@ plainto_tsquery('simple', query)`` using the GIN index
+
+    ``column`` may be a tuple of columns, searched as one document
+    (``COALESCE(a, '') || ' ' || COALESCE(b, '')``, as in the index).
+    """
+    output_field = BooleanField()
+
+    def __init__(self, column, query):
+        columns = (column,) if isinstance(column, str) else column
+        super().__init__(*(F(name) for name in columns), Value(query))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        *columns, query = self.source_expressions
+        parts, params = [], []
+        for column in columns:
+            column_sql, column_params = compiler.compile(column)
+            parts.append(f"COALESCE({column_sql}, '')")
+            params.extend(column_params)
+        document = " || ' ' || ".join(parts)
+        query_sql, query_params = compiler.compile(query)
+        sql = (
+            f"to_tsvector('simple'::regconfig, {document}) "
+            f"@@ plainto_tsquery('simple'::regconfig, {query_sql})"
+        )
+        return sql, (*params, *query_params)
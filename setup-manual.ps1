@@ -97,7 +97,7 @@ Write-Host "5. Collect static files:" -ForegroundColor White
 Write-Host "   python manage.py collectstatic --noinput" -ForegroundColor Gray
 Write-Host ""
 Write-Host "6. Start server:" -ForegroundColor White
-Write-Host "   python manage.py runserver" -ForegroundColor Gray
+Write-Host "   python -m uvicorn asgi:application --reload" -ForegroundColor Gray
 Write-Host ""
 Write-Host "Then access: http://127.0.0.1:8000" -ForegroundColor Cyan
 Write-Host ""
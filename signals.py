@@ -0,0 +1,76 @@
+import copy
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import tasks
+
+from .models import Notification
+from .notifications import adjust_unread, release_unread
+from .push import notification_event, publish_after_commit, publish_unread_counts
+from .recommendations import bump_catalog_version, recommendation_index
+
+
+@receiver(post_save, sender='scholarships.Scholarship')
+def refresh_scholarship_features(sender, instance, **kwargs):
+    """Keep the recommendation index in step with catalog edits, once they commit"""
+    # A copy: the instance may change again before the transaction commits
+    saved = copy.copy(instance)
+    transaction.on_commit(lambda: recommendation_index.refresh(saved, bump_catalog_version()))
+
+
+@receiver(pre_save, sender='scholarships.Scholarship')
+def detect_activation(sender, instance, update_fields=None, **kwargs):
+    """Flag saves that switch an existing scholarship from inactive to active"""
+    instance._activated = (
+        instance.is_active
+        and not instance._state.adding
+        and (update_fields is None or 'is_active' in update_fields)
+        and sender.objects.filter(pk=instance.pk, is_active=False).exists()
+    )
+
+
+@receiver(post_save, sender='scholarships.Scholarship')
+def announce_new_scholarship(sender, instance, created, **kwargs):
+    """Queue notifications for users matching a newly published scholarship
+
+    Published means created active, or activated later; a scholarship that
+    was already announced is not announced again (see accounts.fanout).
+    """
+    if not instance.is_active or not (created or getattr(instance, '_activated', False)):
+        return
+    if not getattr(settings, 'NEW_SCHOLARSHIP_FANOUT', True):
+        return
+    # Queued in the same transaction, so it only runs if the scholarship commits
+    tasks.fan_out_new_scholarship.delay(instance.pk)
+
+
+@receiver(post_delete, sender='scholarships.Scholarship')
+def discard_scholarship_features(sender, instance, **kwargs):
+    """Remove deleted scholarships from the recommendation index, once the delete commits"""
+    # The instance's pk is cleared after the delete, so bind it now
+    scholarship_id = instance.pk
+    transaction.on_commit(lambda: recommendation_index.discard(scholarship_id, bump_catalog_version()))
+
+
+@receiver(pre_delete, sender='scholarships.Scholarship')
+def uncount_cascaded_notifications(sender, instance, **kwargs):
+    """Fix the counters of users whose notifications the delete cascades to
+
+    The cascade removes them without per-row signals (a Notification delete
+    receiver would turn every bulk delete into per-row deletes), so the
+    counters are adjusted here, in the same transaction.
+    """
+    release_unread(Notification.objects.filter(scholarship=instance))
+
+
+@receiver(post_save, sender='accounts.Notification')
+def count_new_notification(sender, instance, created, **kwargs):
+    """Bump the recipient's unread counter / version and push the notification"""
+    if not created:
+        return
+    adjust_unread(instance.user_id, 0 if instance.is_read else 1)
+    publish_after_commit(instance.user_id, notification_event(instance))
+    publish_unread_counts([instance.user_id])
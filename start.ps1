@@ -69,6 +69,6 @@ Write-Host ""
 Write-Host "Press Ctrl+C to stop the server" -ForegroundColor Gray
 Write-Host ""
 
-# Start Django server
-python manage.py runserver
+# Start Django server (ASGI: the notification stream and async views need it)
+python -m uvicorn asgi:application --reload --host 127.0.0.1 --port 8000
 
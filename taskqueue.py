@@ -0,0 +1,230 @@
+"""
+Background tasks with the database as the broker
+
+Functions decorated with ``@task`` are registered by name. ``delay()`` inserts
+a Task row in the caller's transaction, so a task is only ever seen by workers
+once the data it refers to has committed, and nothing beyond the database is
+needed. ``run_task_worker`` processes claim due rows with a conditional
+UPDATE (no row locks, works the same on SQLite and PostgreSQL), run them and
+record how long they took; failures are retried with exponential backoff up to
+``max_attempts``. With ``TASKS_EAGER = True`` (tests, CI) ``delay()`` runs the
+task inline instead.
+"""
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 3
+# Seconds before the first retry; doubled for every further attempt
+DEFAULT_BACKOFF = 10
+MAX_BACKOFF = 3600
+# Seconds a claimed task may run before another worker may take it over
+DEFAULT_TIMEOUT = 600
+# Due rows looked at per claim; losing a race moves on to the next one
+CLAIM_CANDIDATES = 10
+
+_registry = {}
+
+
+class TaskFunction:
+    """A registered task: call it directly, or queue it with ``delay()``"""
+
+    def __init__(self, func, name, max_attempts, backoff, timeout):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return enqueue(self.name, args, kwargs)
+
+    def retry_delay(self, attempts):
+        delay = min(self.backoff * 2 ** (attempts - 1), MAX_BACKOFF)
+        # Jitter keeps a batch that failed together from retrying together
+        return delay + random.uniform(0, delay / 10)
+
+
+def task(name=None, max_attempts=DEFAULT_MAX_ATTEMPTS, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT):
+    """Register a function as a task; arguments must be JSON-serializable"""
+    def register(func):
+        registered = TaskFunction(
+            func, name or f"{func.__module__}.{func.__name__}", max_attempts, backoff, timeout
+        )
+        _registry[registered.name] = registered
+        return registered
+    return register
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"Unknown task {name!r}") from None
+
+
+def enqueue(name, args=(), kwargs=None, delay=0):
+    """Queue a call of task ``name``; returns the Task row (None when eager)"""
+    registered = get_task(name)
+    if getattr(settings, 'TASKS_EAGER', False):
+        registered(*args, **(kwargs or {}))
+        return None
+    return Task.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs or {},
+        max_attempts=registered.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker, names=None):
+    """Take the oldest due task (or one whose worker died); None when idle
+
+    ``names`` restricts the worker to those tasks.
+    """
+    now = timezone.now()
+    # Two simple filters rather than an OR, so each can use the status index
+    for claimable in (Q(status='queued', run_at__lte=now), Q(status='running', lock_expires_at__lt=now)):
+        if names is not None:
+            claimable &= Q(name__in=names)
+        for job in Task.objects.filter(claimable).order_by('run_at')[:CLAIM_CANDIDATES]:
+            if job.status == 'running' and job.attempts >= job.max_attempts:
+                _abandon(job, claimable, now)
+                continue
+            registered = _registry.get(job.name)
+            job.status = 'running'
+            job.locked_by = worker
+            job.lock_expires_at = now + timedelta(seconds=registered.timeout if registered else DEFAULT_TIMEOUT)
+            job.attempts += 1
+            claimed = Task.objects.filter(claimable, pk=job.pk).update(
+                status=job.status,
+                locked_by=job.locked_by,
+                lock_expires_at=job.lock_expires_at,
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                return job
+    return None
+
+
+def _abandon(job, claimable, now):
+    """Fail a task whose last allowed attempt lost its worker"""
+    error = f"Worker {job.locked_by} stopped responding on attempt {job.attempts}/{job.max_attempts}"
+    failed = Task.objects.filter(claimable, pk=job.pk).update(
+        status='failed', finished_at=now, last_error=error, locked_by=None, lock_expires_at=None,
+    )
+    if failed:
+        logger.error('Task %s #%s failed permanently: %s', job.name, job.pk, error)
+
+
+def execute(job):
+    """Run a claimed task and record the outcome; returns True on success"""
+    registered = _registry.get(job.name)
+    started = time.perf_counter()
+    try:
+        if registered is None:
+            raise LookupError(f"Unknown task {job.name!r}")
+        registered(*job.args, **job.kwargs)
+    except Exception:
+        duration_ms = (time.perf_counter() - started) * 1000
+        _record_failure(job, registered, traceback.format_exc(), duration_ms)
+        return False
+    duration_ms = (time.perf_counter() - started) * 1000
+    # Filtered on the lock so a worker that overran its timeout does not
+    # overwrite the state of the worker that took the task over
+    Task.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+        status='succeeded',
+        duration_ms=duration_ms,
+        finished_at=timezone.now(),
+        locked_by=None,
+        lock_expires_at=None,
+    )
+    logger.info('Task %s #%s succeeded in %.1f ms', job.name, job.pk, duration_ms)
+    return True
+
+
+def _record_failure(job, registered, error, duration_ms):
+    now = timezone.now()
+    fields = {'duration_ms': duration_ms, 'last_error': error, 'locked_by': None, 'lock_expires_at': None}
+    if registered is not None and job.attempts < job.max_attempts:
+        delay = registered.retry_delay(job.attempts)
+        fields.update(status='queued', run_at=now + timedelta(seconds=delay))
+        logger.warning('Task %s #%s failed (attempt %s/%s), retrying in %.0fs',
+                       job.name, job.pk, job.attempts, job.max_attempts, delay)
+    else:
+        fields.update(status='failed', finished_at=now)
+        logger.error('Task %s #%s failed permanently after %s attempts:\n%s',
+                     job.name, job.pk, job.attempts, error)
+    Task.objects.filter(pk=job.pk, locked_by=job.locked_by).update(**fields)
+
+
+def work(worker=None, burst=False, poll_interval=1.0, max_tasks=None, should_stop=None, names=None):
+    """Claim and run tasks until stopped; returns the number processed
+
+    ``burst`` returns as soon as the queue is empty; ``names`` limits the
+    worker to those tasks.
+    """
+    worker = worker or worker_name()
+    processed = 0
+    while max_tasks is None or processed < max_tasks:
+        if should_stop is not None and should_stop():
+            break
+        # Like a request boundary; skipped when the caller holds a transaction
+        if not connection.in_atomic_block:
+            close_old_connections()
+        job = claim(worker, names)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        execute(job)
+        processed += 1
+    return processed
+
+
+def task_stats(since=None):
+    """Per-task queue depth, outcome counts and run times (ms)"""
+    tasks = Task.objects.all()
+    if since is not None:
+        tasks = tasks.filter(Q(finished_at__isnull=True) | Q(finished_at__gte=since))
+    succeeded = Q(status='succeeded')
+    rows = tasks.values('name').annotate(
+        queued=Count('pk', filter=Q(status='queued')),
+        running=Count('pk', filter=Q(status='running')),
+        succeeded=Count('pk', filter=succeeded),
+        failed=Count('pk', filter=Q(status='failed')),
+        retried=Count('pk', filter=Q(attempts__gt=1)),
+        avg_ms=Avg('duration_ms', filter=succeeded),
+        max_ms=Max('duration_ms', filter=succeeded),
+    ).order_by('name')
+    return {row.pop('name'): row for row in rows}
+
+
+def purge_finished(days):
+    """Delete succeeded tasks finished more than ``days`` ago; failures are kept"""
+    cutoff = timezone.now() - timedelta(days=days)
+    return Task.objects.filter(status='succeeded', finished_at__lt=cutoff).delete()[0]
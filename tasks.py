@@ -0,0 +1,45 @@
+"""
+Background tasks of the accounts app
+
+Queued with ``<task>.delay(...)`` and run by ``manage.py run_task_worker``.
+"""
+from django.core.mail import send_mail
+
+from . import fanout, notifications
+from .models import Notification, User
+from .taskqueue import task
+
+
+@task(max_attempts=5, backoff=30)
+def send_welcome_email(user_id):
+    """Greet a new user; retried while the mail server is unavailable
+
+    Queued at signup only with ``WELCOME_EMAIL = True``, and by import_users
+    with --welcome-email.
+    """
+    user = User.objects.filter(pk=user_id).only('email', 'full_name').first()
+    if user is None:
+        return
+    send_mail(
+        subject='Welcome to ScholarMatch',
+        message=(
+            f"Hi {user.full_name},\n\n"
+            "Thanks for joining ScholarMatch! Complete your academic profile to get "
+            "scholarship recommendations that match your program level, field of study "
+            "and preferred country.\n\nThe ScholarMatch Team"
+        ),
+        from_email=None,
+        recipient_list=[user.email],
+    )
+
+
+@task(timeout=3600)
+def fan_out_new_scholarship(scholarship_id):
+    """Send new_scholarship notifications; resumes from its checkpoint when retried"""
+    fanout.fan_out_new_scholarship(scholarship_id)
+
+
+@task()
+def apply_notification_action(action, notification_ids):
+    """One chunk of a large NotificationAdmin bulk action"""
+    notifications.BULK_ACTIONS[action](Notification.objects.filter(pk__in=notification_ids))
@@ -14,11 +14,15 @@ urlpatterns = [
     path('api/update-profile/', views.update_profile, name='update_profile'),
     path('api/change-password/', views.change_password, name='change_password'),
     path('notifications/', views.notifications_view, name='notifications'),
+    path('api/notifications/', views.list_notifications, name='list_notifications'),
     path('api/notifications/unread-count/', views.get_unread_count, name='get_unread_count'),
+    path('api/notifications/stream/', views.notification_stream, name='notification_stream'),
     path('api/notifications/<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
     path('api/notifications/<int:notification_id>/delete/', views.delete_notification, name='delete_notification'),
     path('api/notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
     path('api/notifications/delete-selected/', views.delete_selected_notifications, name='delete_selected_notifications'),
     path('api/notifications/delete-all/', views.delete_all_notifications, name='delete_all_notifications'),
+    path('api/recommendations/cache-stats/', views.recommendation_cache_stats, name='recommendation_cache_stats'),
+    path('api/tasks/stats/', views.task_queue_stats, name='task_queue_stats'),
 ]
 
@@ -0,0 +1,183 @@
+"""
+Declarative validation for the account forms
+
+A form is a tuple of Fields, each with an ordered list of rules; the first
+failing rule gives the field's message. ``validate`` checks a whole submission
+in one pass and returns the cleaned values with every error at once. Patterns
+are compiled at import. Uniqueness (email) is left to the database constraint.
+"""
+import re
+
+from .choices import BUDGET_RANGES, PREFERRED_PROGRAM_LEVELS, PROGRAM_LEVELS, STUDY_DURATIONS
+
+
+FULL_NAME_RE = re.compile(r'^[A-Za-z\s]+$')
+EMAIL_RE = re.compile(r'^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$', re.IGNORECASE)
+GRADES_RE = re.compile(r'^[0-9]+%?$')
+
+
+# Rules take (value, data) and return an error message or None; apart from
+# required() they accept empty values
+
+
+def required(message):
+    return lambda value, data: message if not value else None
+
+
+def min_length(limit, message):
+    return lambda value, data: message if value and len(value) < limit else None
+
+
+def max_length(limit, message):
+    return lambda value, data: message if value and len(value) > limit else None
+
+
+def pattern(regex, message):
+    return lambda value, data: message if value and not regex.match(value) else None
+
+
+def same_as(other, message):
+    return lambda value, data: message if value != data.get(other, '') else None
+
+
+def one_of(values, message):
+    """Case-insensitive membership in ``values`` (lowercase)"""
+    values = frozenset(values)
+    return lambda value, data: message if value and value.lower() not in values else None
+
+
+def to_float(value):
+    """Lenient number parsing: invalid input becomes None"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Field:
+    """One submitted value: how to normalize it and which rules it must pass"""
+
+    def __init__(self, name, *rules, strip=True, clean=None):
+        self.name = name
+        self.rules = rules
+        self.strip = strip
+        self.clean = clean
+
+
+def validate(form, data, partial=False):
+    """Return (cleaned, errors) for ``data``
+
+    With ``partial`` only the fields present in ``data`` are checked, as for
+    profile updates that send a subset of the form.
+    """
+    cleaned = {}
+    errors = {}
+    for field in form:
+        if partial and field.name not in data:
+            continue
+        value = data.get(field.name)
+        if not isinstance(value, str):
+            # JSON bodies may carry numbers or nulls
+            value = '' if value is None else str(value)
+        if field.strip:
+            value = value.strip()
+        for rule in field.rules:
+            message = rule(value, data)
+            if message:
+                errors[field.name] = message
+                break
+        cleaned[field.name] = field.clean(value) if field.clean else value
+    return cleaned, errors
+
+
+def first_error(errors):
+    return next(iter(errors.values()), None)
+
+
+FULL_NAME_RULES = (
+    max_length(50, 'Full name must be 50 characters or less'),
+    pattern(FULL_NAME_RE, 'Full name can only contain letters and spaces'),
+)
+GRADES_RULES = (
+    max_length(10, 'Grades must be 10 characters or less'),
+    pattern(GRADES_RE, 'Grades must be numeric with optional % sign (e.g., 85 or 85%)'),
+)
+
+# The coded columns (accounts.choices) only hold their listed slugs:
+# (signup name, profile name, rule)
+CHOICE_RULES = (
+    ('program-level', 'program_level', one_of(PROGRAM_LEVELS.codes, 'Please select a valid program level')),
+    ('preferred-program-level', 'preferred_program_level',
+     one_of(PREFERRED_PROGRAM_LEVELS.codes, 'Please select a valid preferred program level')),
+    ('budget-range', 'budget_range', one_of(BUDGET_RANGES.codes, 'Please select a valid budget range')),
+    ('study-duration', 'study_duration', one_of(STUDY_DURATIONS.codes, 'Please select a valid study duration')),
+)
+
+SIGNUP_FORM = (
+    Field('full-name', required('Full name is required'), *FULL_NAME_RULES),
+    Field(
+        'email',
+        required('Email is required'),
+        max_length(254, 'Email address is too long (max 254 characters)'),
+        pattern(EMAIL_RE, 'Please enter a valid email address'),
+    ),
+    Field(
+        'password',
+        required('Password is required'),
+        min_length(8, 'Password must be at least 8 characters long'),
+        max_length(128, 'Password must be 128 characters or less'),
+        strip=False,
+    ),
+    Field('confirm-password', same_as('password', 'Passwords do not match'), strip=False),
+    # Optional, accepts any value
+    Field('cgpa', clean=to_float),
+    Field('grades', *GRADES_RULES),
+    *(Field(name, rule) for name, _, rule in CHOICE_RULES),
+)
+
+PROFILE_FORM = (
+    Field('full_name', required('Full name is required'), *FULL_NAME_RULES),
+    Field('cgpa', clean=to_float),
+    Field('grades', *GRADES_RULES),
+    *(Field(name, rule) for _, name, rule in CHOICE_RULES),
+)
+
+CHANGE_PASSWORD_FORM = (
+    Field('current_password', required('All password fields are required'), strip=False),
+    Field(
+        'new_password',
+        required('All password fields are required'),
+        min_length(8, 'New password must be at least 8 characters long'),
+        max_length(128, 'New password must be 128 characters or less'),
+        strip=False,
+    ),
+    Field(
+        'confirm_password',
+        required('All password fields are required'),
+        same_as('new_password', 'New passwords do not match'),
+        strip=False,
+    ),
+)
+
+
+# Bulk imports (accounts.onboarding): the signup rules, plus length limits for
+# the columns the signup view stores unchecked, so a bad row fails alone
+# instead of aborting the database insert of its whole chunk
+IMPORT_EXTRA_FIELDS = tuple(
+    Field(name, max_length(limit, f'{label} must be {limit} characters or less'))
+    for name, label, limit in (
+        ('field-of-study', 'Field of study', 100),
+        ('country', 'Country', 100),
+        ('preferred-country', 'Preferred country', 100),
+        ('phone', 'Phone', 20),
+    )
+) + (Field('address'), Field('bio'))
+
+IMPORT_FORM = SIGNUP_FORM + IMPORT_EXTRA_FIELDS
+
+# For accounts created without a password (users set one by password reset)
+IMPORT_FORM_WITHOUT_PASSWORD = tuple(
+    field for field in IMPORT_FORM if field.name not in ('password', 'confirm-password')
+)
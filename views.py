@@ -1,16 +1,53 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.contrib.auth.views import redirect_to_login
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
+from django.conf import settings
 from django.contrib import messages
+from django.db import IntegrityError, transaction
+from asgiref.sync import async_to_sync, sync_to_async
+from functools import wraps
 import json
-from .models import User, UserProfile, Notification
+from .models import UserProfile, Notification
+from . import notifications, passwords, push, ratelimit, recommendations, taskqueue, tasks
+from .dashboard import load_dashboard
+from .onboarding import build_user
+from .pagination import InvalidCursor, keyset_page
+from .validators import CHANGE_PASSWORD_FORM, PROFILE_FORM, SIGNUP_FORM, first_error, validate
 from django.utils import timezone
 from datetime import timedelta
 
 
+NOTIFICATIONS_PAGE_SIZE = 20
+MAX_NOTIFICATIONS_PAGE_SIZE = 100
+
+
+def async_post_endpoint(view):
+    """@csrf_exempt + @require_http_methods(["POST"]) for async views
+
+    Django 4.2's versions of those decorators only wrap sync views.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        return await view(request, *args, **kwargs)
+    
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+async def get_authenticated_user(request):
+    """request.user from an async view (loading it queries the session), or None"""
+    return await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+
+
 def index_view(request):
     """Home/Index page view - redirects based on authentication"""
     if request.user.is_authenticated:
@@ -24,14 +61,27 @@ def signup_view(request):
         return redirect('index')
     
     if request.method == 'POST':
-        return handle_signup(request)
+        return async_to_sync(handle_signup)(request)
     
     return render(request, 'signup.html')
 
 
-@csrf_exempt
-@require_http_methods(["POST"])
-def handle_signup(request):
+def create_account(email, password_hash, cleaned, data):
+    """Create the user, their profile and (with WELCOME_EMAIL) the welcome-email task"""
+    # One transaction: three INSERTs and a single commit
+    with transaction.atomic():
+        user = build_user(email, password_hash, cleaned, data)
+        user.save()
+        UserProfile.objects.create(user=user)
+        # Off unless outgoing mail is set up; sent by a task worker so SMTP
+        # latency never delays signup
+        if getattr(settings, 'WELCOME_EMAIL', False):
+            tasks.send_welcome_email.delay(user.pk)
+    return user
+
+
+@async_post_endpoint
+async def handle_signup(request):
     """Handle signup form submission"""
     try:
         # Handle both JSON and FormData
@@ -48,89 +98,23 @@ def handle_signup(request):
                 else:
                     data[key] = value
         
-        # Extract form data
-        email = data.get('email', '').strip()
-        password = data.get('password', '')
-        confirm_password = data.get('confirm-password', '')
-        full_name = data.get('full-name', '').strip()
-        cgpa = data.get('cgpa', '').strip()
-        grades = data.get('grades', '').strip()
-        
-        # Validation
-        errors = {}
-        import re
-        
-        # Full Name Validation
-        if not full_name:
-            errors['full-name'] = 'Full name is required'
-        elif len(full_name) > 50:
-            errors['full-name'] = 'Full name must be 50 characters or less'
-        elif not re.match(r'^[A-Za-z\s]+$', full_name):
-            errors['full-name'] = 'Full name can only contain letters and spaces'
-        
-        # Email Validation
-        if not email:
-            errors['email'] = 'Email is required'
-        elif len(email) > 254:
-            errors['email'] = 'Email address is too long (max 254 characters)'
-        elif not re.match(r'^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$', email, re.IGNORECASE):
-            errors['email'] = 'Please enter a valid email address'
-        elif User.objects.filter(email=email).exists():
-            errors['email'] = 'Email already exists'
-        
-        # Password Validation
-        if not password:
-            errors['password'] = 'Password is required'
-        elif len(password) < 8:
-            errors['password'] = 'Password must be at least 8 characters long'
-        elif len(password) > 128:
-            errors['password'] = 'Password must be 128 characters or less'
-        
-        if password != confirm_password:
-            errors['confirm-password'] = 'Passwords do not match'
-        
-        # CGPA Validation (optional, accepts any value)
-        cgpa_value = None
-        if cgpa:
-            try:
-                cgpa_value = float(cgpa) if cgpa else None
-            except ValueError:
-                # If not a valid number, store as None (optional field)
-                cgpa_value = None
-        
-        # Grades Validation (numeric with optional %)
-        if grades:
-            if len(grades) > 10:
-                errors['grades'] = 'Grades must be 10 characters or less'
-            elif not re.match(r'^[0-9]+%?$', grades):
-                errors['grades'] = 'Grades must be numeric with optional % sign (e.g., 85 or 85%)'
-        
+        # Validate every field in one pass; email uniqueness is left to the
+        # database constraint below
+        cleaned, errors = validate(SIGNUP_FORM, data)
         if errors:
             return JsonResponse({'success': False, 'errors': errors}, status=400)
         
-        # Create user
-        user = User.objects.create_user(
-            username=email,  # Use email as username
-            email=email,
-            password=password,
-            full_name=full_name,
-            program_level=data.get('program-level', ''),
-            field_of_study=data.get('field-of-study', ''),
-            cgpa=cgpa_value,
-            grades=grades if grades else '',
-            country=data.get('country', ''),
-            preferred_country=data.get('preferred-country', ''),
-            preferred_program_level=data.get('preferred-program-level', ''),
-            budget_range=data.get('budget-range', ''),
-            study_duration=data.get('study-duration', ''),
-            newsletter_subscribed=data.get('newsletter', False) in (True, 'on', 'true', 'True'),
-        )
-        
-        # Create user profile
-        UserProfile.objects.create(user=user)
+        # Hashed in the password pool while this request waits without
+        # holding a worker
+        password_hash = await passwords.make_password(cleaned['password'])
+        try:
+            user = await sync_to_async(create_account)(cleaned['email'], password_hash, cleaned, data)
+        except IntegrityError:
+            # email (and username, which mirrors it) are unique
+            return JsonResponse({'success': False, 'errors': {'email': 'Email already exists'}}, status=400)
         
         # Auto login after signup
-        login(request, user)
+        await sync_to_async(login)(request, user, passwords.MODEL_BACKEND)
         
         return JsonResponse({
             'success': True,
@@ -154,16 +138,39 @@ def login_view(request):
         return redirect('index')
     
     if request.method == 'POST':
-        return handle_login(request)
+        return async_to_sync(handle_login)(request)
     
     return render(request, 'login.html')
 
 
-@csrf_exempt
-@require_http_methods(["POST"])
-def handle_login(request):
+def too_many_attempts(retry_after):
+    response = JsonResponse({
+        'success': False,
+        'errors': {'general': f'Too many login attempts. Please try again in {retry_after} seconds.'}
+    }, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def start_session(request, user, remember_me):
+    login(request, user)
+    
+    # Handle remember me
+    if not remember_me:
+        request.session.set_expiry(0)  # Session expires when browser closes
+    else:
+        request.session.set_expiry(86400 * 30)  # 30 days
+
+
+@async_post_endpoint
+async def handle_login(request):
     """Handle login form submission"""
     try:
+        # Throttled before the body, the database or the hasher are touched
+        retry_after = await ratelimit.ahit('login-ip', ratelimit.client_ip(request))
+        if retry_after:
+            return too_many_attempts(retry_after)
+        
         data = json.loads(request.body) if request.content_type == 'application/json' else request.POST
         
         email = data.get('email', '').strip()
@@ -180,17 +187,17 @@ def handle_login(request):
         if errors:
             return JsonResponse({'success': False, 'errors': errors}, status=400)
         
-        # Authenticate user
-        user = authenticate(request, username=email, password=password)
+        retry_after = await ratelimit.ahit('login-email', email.lower())
+        if retry_after:
+            return too_many_attempts(retry_after)
+        
+        # Authenticate user; the password check runs in the password pool
+        user = await passwords.authenticate(request, email, password)
         
         if user is not None:
-            login(request, user)
-            
-            # Handle remember me
-            if not remember_me:
-                request.session.set_expiry(0)  # Session expires when browser closes
-            else:
-                request.session.set_expiry(86400 * 30)  # 30 days
+            # Earlier typos should not count against the next login
+            await ratelimit.areset('login-email', email.lower())
+            await sync_to_async(start_session)(request, user, remember_me)
             
             return JsonResponse({
                 'success': True,
@@ -220,46 +227,45 @@ def logout_view(request):
 @login_required
 def dashboard_view(request):
     """Dashboard/Home page view with overview and recommended scholarships"""
-    from scholarships.models import Scholarship, BookmarkedScholarship, ScholarshipApplication
+    # User stats come from one aggregated query, recommendations (max 6,
+    # featured fallback) from the per-user recommendation cache
+    context = load_dashboard(request.user)
+    context['user'] = request.user
     
-    # Get user's profile info for matching
-    user = request.user
-    
-    # Get recommended scholarships based on user profile
-    recommended = Scholarship.objects.filter(is_active=True)
-    
-    # Filter by user's preferences
-    if user.program_level:
-        recommended = recommended.filter(program_level=user.program_level)
-    if user.preferred_country:
-        recommended = recommended.filter(study_country__icontains=user.preferred_country)
-    if user.field_of_study:
-        recommended = recommended.filter(field_of_study__icontains=user.field_of_study)
-    
-    # If no matches, show featured scholarships
-    if not recommended.exists():
-        recommended = Scholarship.objects.filter(is_active=True, is_featured=True)
-    
-    # Limit to 6 recommendations
-    recommended = recommended[:6]
-    
-    # Get user stats
-    total_bookmarks = BookmarkedScholarship.objects.filter(user=user).count()
-    unread_notifications = Notification.objects.filter(user=user, is_read=False).count()
-    
-    return render(request, 'dashboard.html', {
-        'recommended_scholarships': recommended,
-        'total_bookmarks': total_bookmarks,
-        'unread_notifications': unread_notifications,
-        'user': request.user
-    })
+    return render(request, 'dashboard.html', context)
+
+
+@staff_member_required
+def recommendation_cache_stats(request):
+    """Recommendation cache hit/miss counters for this worker (API endpoint)"""
+    return JsonResponse(recommendations.cache_stats())
+
+
+@staff_member_required
+def task_queue_stats(request):
+    """Background task queue depth and run times over the last day (API endpoint)"""
+    since = timezone.now() - timedelta(days=1)
+    return JsonResponse({'tasks': taskqueue.task_stats(since=since)})
+
+
+def get_profile(user):
+    """The user's profile, or an unsaved one for accounts created outside signup"""
+    # Signup creates the profile and backfill_profiles covered older accounts,
+    # so this is a plain fetch rather than get_or_create
+    try:
+        return user.profile
+    except UserProfile.DoesNotExist:
+        profile = UserProfile(user=user)
+        # Saved by update_profile only once a field differs from the defaults
+        profile.mark_clean()
+        return profile
 
 
 @login_required
 def settings_view(request):
     """Settings page for user to edit profile, change password, etc."""
     user = request.user
-    profile, created = UserProfile.objects.get_or_create(user=user)
+    profile = get_profile(user)
     
     context = {
         'user': user,
@@ -282,7 +288,7 @@ def update_profile(request):
     """Update user profile information"""
     try:
         user = request.user
-        profile, created = UserProfile.objects.get_or_create(user=user)
+        profile = get_profile(user)
         
         # Handle form data
         data = request.POST.dict() if hasattr(request.POST, 'dict') else dict(request.POST)
@@ -290,22 +296,27 @@ def update_profile(request):
             if isinstance(value, list) and len(value) == 1:
                 data[key] = value[0]
         
+        cleaned, errors = validate(PROFILE_FORM, data, partial=True)
+        if errors:
+            return JsonResponse({
+                'success': False,
+                'message': first_error(errors),
+                'errors': errors
+            }, status=400)
+        
         # Update User table fields separately
         if 'full_name' in data:
-            user.full_name = data['full_name'][:50]  # Enforce 50 char limit
+            user.full_name = cleaned['full_name']
         if 'program_level' in data:
             user.program_level = data['program_level'] if data['program_level'] else None
         if 'field_of_study' in data:
             user.field_of_study = data['field_of_study'] if data['field_of_study'] else None
         if 'country' in data:
             user.country = data['country'] if data['country'] else None
-        if 'cgpa' in data and data['cgpa']:
-            try:
-                user.cgpa = float(data['cgpa'])
-            except (ValueError, TypeError):
-                pass
+        if cleaned.get('cgpa') is not None:
+            user.cgpa = cleaned['cgpa']
         if 'grades' in data:
-            user.grades = data['grades'] if data['grades'] else None
+            user.grades = cleaned['grades'] or None
         if 'preferred_country' in data:
             user.preferred_country = data['preferred_country'] if data['preferred_country'] else None
         if 'preferred_program_level' in data:
@@ -325,13 +336,20 @@ def update_profile(request):
         if 'bio' in data:
             profile.bio = data['bio'] if data['bio'] else None
         
-        # Save User and UserProfile tables separately
-        user.save()
-        profile.save()
+        # Write only the columns that changed, and skip unchanged tables
+        user_changed = user.changed_fields()
+        profile_changed = profile.changed_fields()
+        if user_changed:
+            user.save()
+            # Academic fields may have changed, so recompute recommendations
+            recommendations.invalidate_user(user.pk)
+        if profile_changed:
+            profile.save()
         
         return JsonResponse({
             'success': True,
-            'message': 'Profile updated successfully!'
+            'message': 'Profile updated successfully!' if user_changed or profile_changed else 'No changes to save',
+            'changed_fields': user_changed + profile_changed
         })
         
     except Exception as e:
@@ -344,56 +362,39 @@ def update_profile(request):
         }, status=500)
 
 
-@login_required
-@csrf_exempt
-@require_http_methods(["POST"])
-def change_password(request):
+@async_post_endpoint
+async def change_password(request):
     """Change user password"""
+    user = await get_authenticated_user(request)
+    if user is None:
+        return redirect_to_login(request.get_full_path())
     try:
-        user = request.user
-        
         # Handle form data
         data = request.POST.dict() if hasattr(request.POST, 'dict') else dict(request.POST)
         for key, value in data.items():
             if isinstance(value, list) and len(value) == 1:
                 data[key] = value[0]
         
-        current_password = data.get('current_password', '')
-        new_password = data.get('new_password', '')
-        confirm_password = data.get('confirm_password', '')
-        
-        # Validation
-        if not current_password or not new_password or not confirm_password:
+        # Form checks first, so an invalid submission never pays for hashing
+        cleaned, errors = validate(CHANGE_PASSWORD_FORM, data)
+        if errors:
             return JsonResponse({
                 'success': False,
-                'message': 'All password fields are required'
+                'message': first_error(errors)
             }, status=400)
         
-        if not user.check_password(current_password):
+        if not await passwords.check_password(user, cleaned['current_password']):
             return JsonResponse({
                 'success': False,
                 'message': 'Current password is incorrect'
             }, status=400)
         
-        if len(new_password) < 8:
-            return JsonResponse({
-                'success': False,
-                'message': 'New password must be at least 8 characters long'
-            }, status=400)
-        
-        if new_password != confirm_password:
-            return JsonResponse({
-                'success': False,
-                'message': 'New passwords do not match'
-            }, status=400)
-        
         # Update password
-        user.set_password(new_password)
-        user.save()
+        user.password = await passwords.make_password(cleaned['new_password'])
+        await user.asave(update_fields=['password'])
         
         # Re-login user with new password
-        from django.contrib.auth import login
-        login(request, user)
+        await sync_to_async(login)(request, user, passwords.MODEL_BACKEND)
         
         return JsonResponse({
             'success': True,
@@ -411,17 +412,24 @@ def change_password(request):
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=notifications.notifications_page_etag)
 def notifications_view(request):
     """View all notifications for the user"""
-    # Get all notifications for the current user
-    notifications_queryset = Notification.objects.filter(user=request.user).order_by('-created_at')
-    unread_count = notifications_queryset.filter(is_read=False).count()
-    
-    # Convert queryset to list to ensure it's evaluated
-    notifications_list = list(notifications_queryset)
+    # One page of the current user's notifications, newest first
+    try:
+        notifications_list, next_cursor = keyset_page(
+            Notification.objects.filter(user=request.user),
+            cursor=request.GET.get('cursor'),
+            page_size=NOTIFICATIONS_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        return redirect('notifications')
+    unread_count = request.user.unread_notifications_count
     
     context = {
         'notifications': notifications_list,
+        'next_cursor': next_cursor,
         'unread_count': unread_count,
         'user': request.user,  # Ensure user is in context
     }
@@ -429,16 +437,43 @@ def notifications_view(request):
     return render(request, 'notifications.html', context)
 
 
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=notifications.unread_count_etag)
+def list_notifications(request):
+    """Paginated notifications for the user (API endpoint)"""
+    try:
+        page_size = min(int(request.GET.get('page_size', NOTIFICATIONS_PAGE_SIZE)), MAX_NOTIFICATIONS_PAGE_SIZE)
+    except ValueError:
+        page_size = NOTIFICATIONS_PAGE_SIZE
+    try:
+        items, next_cursor = keyset_page(
+            Notification.objects.filter(user=request.user),
+            cursor=request.GET.get('cursor'),
+            page_size=max(page_size, 1),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'notifications': [push.notification_payload(n) for n in items],
+        'next_cursor': next_cursor,
+        'unread_count': request.user.unread_notifications_count,
+    })
+
+
 @login_required
 @csrf_exempt
 @require_http_methods(["POST"])
 def mark_notification_read(request, notification_id):
     """Mark a notification as read"""
     try:
-        notification = Notification.objects.get(id=notification_id, user=request.user)
-        notification.is_read = True
-        notification.read_at = timezone.now()
-        notification.save()
+        if not notifications.mark_read(request.user, notification_id, timezone.now()):
+            raise Notification.DoesNotExist
         
         return JsonResponse({
             'success': True,
@@ -462,8 +497,11 @@ def mark_notification_read(request, notification_id):
 def delete_notification(request, notification_id):
     """Delete a single notification"""
     try:
-        notification = Notification.objects.get(id=notification_id, user=request.user)
-        notification.delete()
+        deleted_count = notifications.delete_notifications(
+            request.user, Notification.objects.filter(id=notification_id, user=request.user)
+        )
+        if not deleted_count:
+            raise Notification.DoesNotExist
         
         return JsonResponse({
             'success': True,
@@ -497,10 +535,10 @@ def delete_selected_notifications(request):
                 'message': 'No notifications selected'
             }, status=400)
         
-        deleted_count = Notification.objects.filter(
+        deleted_count = notifications.delete_notifications(request.user, Notification.objects.filter(
             id__in=notification_ids,
             user=request.user
-        ).delete()[0]
+        ))
         
         return JsonResponse({
             'success': True,
@@ -520,7 +558,9 @@ def delete_selected_notifications(request):
 def delete_all_notifications(request):
     """Delete all notifications for the user"""
     try:
-        deleted_count = Notification.objects.filter(user=request.user).delete()[0]
+        deleted_count = notifications.delete_notifications(
+            request.user, Notification.objects.filter(user=request.user)
+        )
         
         return JsonResponse({
             'success': True,
@@ -540,13 +580,7 @@ def delete_all_notifications(request):
 def mark_all_notifications_read(request):
     """Mark all notifications as read"""
     try:
-        updated = Notification.objects.filter(
-            user=request.user,
-            is_read=False
-        ).update(
-            is_read=True,
-            read_at=timezone.now()
-        )
+        updated = notifications.mark_all_read(request.user, timezone.now())
         
         return JsonResponse({
             'success': True,
@@ -559,11 +593,39 @@ def mark_all_notifications_read(request):
         }, status=500)
 
 
+async def notification_stream(request):
+    """Stream new notifications and unread-count changes (Server-Sent Events)"""
+    user = await get_authenticated_user(request)
+    if user is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Authentication required'
+        }, status=401)
+    
+    if not isinstance(request, ASGIRequest):
+        # WSGI would buffer the whole stream and hold a thread meanwhile
+        return JsonResponse({
+            'success': False,
+            'message': 'Streaming needs the ASGI server; poll the unread count instead'
+        }, status=501)
+    
+    subscription = push.get_broker().subscribe(user.pk)
+    response = StreamingHttpResponse(
+        push.event_stream(subscription, user.unread_notifications_count),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the stream
+    return response
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=notifications.unread_count_etag)
 def get_unread_count(request):
     """Get unread notification count (API endpoint)"""
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
+    # Served from the denormalized counter on the (already loaded) user row
     return JsonResponse({
-        'unread_count': count
+        'unread_count': request.user.unread_notifications_count
     })
 